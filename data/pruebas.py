@@ -1,5 +1,32 @@
 
-from models.analizador import analizar_complejidad
+import functools
+import hashlib
+import os
+import pickle
+import sys
+
+# Esqueletos compartidos por varias pruebas (for simple y for anidado con i/j).
+# Las pruebas construidas con ellos son idénticas, byte a byte, a escribirlas a mano.
+_FOR_SIMPLE = """
+begin
+    for i 🡨 1 to {limite} do
+    begin
+        {cuerpo}
+    end
+end
+"""
+
+_FOR_DOBLE = """
+begin
+    for i 🡨 1 to n do
+    begin
+        for j 🡨 1 to {limite} do
+        begin
+            {cuerpo}
+        end
+    end
+end
+"""
 
 # Prueba 1: Algoritmo Constante
 algo_constante = """
@@ -152,40 +179,16 @@ end
 """
 
 # Prueba 12: Bucle lineal con llamada a función O(1)
-algo_call_o1 = """
-begin
-    for i 🡨 1 to n do
-    begin
-        CALL imprimir(i)  ► O(1)
-    end
-end
-"""
+algo_call_o1 = _FOR_SIMPLE.format(limite="n", cuerpo="CALL imprimir(i)  ► O(1)")
 # Esperado: O(n)
 
 # Prueba 13: Bucle lineal con llamada a función O(n)
 # Nota: La complejidad se convierte en O(n^2)
-algo_call_on = """
-begin
-    for i 🡨 1 to n do
-    begin
-        CALL busqueda_lineal(A, n)  ► O(n)
-    end
-end
-"""
+algo_call_on = _FOR_SIMPLE.format(limite="n", cuerpo="CALL busqueda_lineal(A, n)  ► O(n)")
 # Esperado: O(n^2)
 
 # Prueba 14: Bucle O(n^2) con llamada O(1)
-algo_call_anidado = """
-begin
-    for i 🡨 1 to n do
-    begin
-        for j 🡨 1 to n do
-        begin
-            CALL swap(A, i, j)  ► O(1)
-        end
-    end
-end
-"""
+algo_call_anidado = _FOR_DOBLE.format(limite="n", cuerpo="CALL swap(A, i, j)  ► O(1)")
 # Esperado: O(n^2)
 
 # Prueba 15: Función recursiva que llama a una O(n)
@@ -284,28 +287,11 @@ end
 # Esperado: Peor O(n), Mejor Ω(n), Promedio Θ(n)
 
 # Prueba 21: Acceso a arreglo en for
-algo_for_length_m = """
-begin
-    for i 🡨 1 to length(B) do
-    begin
-        x 🡨 B[i]
-    end
-end
-"""
+algo_for_length_m = _FOR_SIMPLE.format(limite="length(B)", cuerpo="x 🡨 B[i]")
 # Esperado: O(n) (asumiendo length(B) ~ n)
 
 # Prueba 22: For con paso constante pero trabajo O(n) interno
-algo_for_y_for_interno = """
-begin
-    for i 🡨 1 to n do
-    begin
-        for j 🡨 1 to n do
-        begin
-            x 🡨 x + 1
-        end
-    end
-end
-"""
+algo_for_y_for_interno = _FOR_DOBLE.format(limite="n", cuerpo="x 🡨 x + 1")
 # Esperado: O(n^2)
 
 # Prueba 23: Repeat con multiplicación por 3 (log n)
@@ -332,17 +318,7 @@ end
 # Esperado: O(n)
 
 # Prueba 25: Llamada conocida en bucle cuadrático
-algo_call_swap_n2 = """
-begin
-    for i 🡨 1 to n do
-    begin
-        for j 🡨 1 to n do
-        begin
-            CALL swap(A, i, j)
-        end
-    end
-end
-"""
+algo_call_swap_n2 = _FOR_DOBLE.format(limite="n", cuerpo="CALL swap(A, i, j)")
 # Esperado: O(n^2)
 
 # Prueba 26: Llamada O(n) en bucle O(n log n) interno
@@ -383,28 +359,11 @@ end
 # Esperado: Peor O(n^2), Mejor Ω(1)
 
 # Prueba 28: For hasta m (otro parámetro), trabajo constante
-algo_for_m = """
-begin
-    for i 🡨 1 to m do
-    begin
-        x 🡨 x + 1
-    end
-end
-"""
+algo_for_m = _FOR_SIMPLE.format(limite="m", cuerpo="x 🡨 x + 1")
 # Esperado: O(m) (si m ≠ n)
 
 # Prueba 29: Combinación n y m en doble bucle
-algo_for_n_y_m = """
-begin
-    for i 🡨 1 to n do
-    begin
-        for j 🡨 1 to m do
-        begin
-            x 🡨 x + 1
-        end
-    end
-end
-"""
+algo_for_n_y_m = _FOR_DOBLE.format(limite="m", cuerpo="x 🡨 x + 1")
 # Esperado: O(n*m)
 
 # Prueba 30: Recursión con 3 llamadas y trabajo lineal
@@ -427,28 +386,11 @@ end
 # Esperado: O(n^{log_2 3})
 
 # Prueba DP 1: Tabla 1D con bucle único (O(n))
-algo_dp_1d = """
-begin
-    for i 🡨 1 to n do
-    begin
-        dp[i] 🡨 dp[i-1] + 1
-    end
-end
-"""
+algo_dp_1d = _FOR_SIMPLE.format(limite="n", cuerpo="dp[i] 🡨 dp[i-1] + 1")
 # Esperado: O(n)
 
 # Prueba DP 2: Tabla 2D con doble bucle (O(n*m))
-algo_dp_2d = """
-begin
-    for i 🡨 1 to n do
-    begin
-        for j 🡨 1 to m do
-        begin
-            dp[i][j] 🡨 min(dp[i-1][j], dp[i][j-1]) + 1
-        end
-    end
-end
-"""
+algo_dp_2d = _FOR_DOBLE.format(limite="m", cuerpo="dp[i][j] 🡨 min(dp[i-1][j], dp[i][j-1]) + 1")
 # Esperado: O(n*m)
 
 # Prueba DP 3: Memoización 1D sin bucles (heurística O(n))
@@ -474,17 +416,7 @@ end
 # Esperado: O(n*m) (heurística por número de estados)
 
 # Prueba DP 5: DP 2D con transición O(1) y for n^2 (O(n^2))
-algo_dp_2d_n2 = """
-begin
-    for i 🡨 1 to n do
-    begin
-        for j 🡨 1 to n do
-        begin
-            dp[i][j] 🡨 max(dp[i-1][j], dp[i][j-1]) + 1
-        end
-    end
-end
-"""
+algo_dp_2d_n2 = _FOR_DOBLE.format(limite="n", cuerpo="dp[i][j] 🡨 max(dp[i-1][j], dp[i][j-1]) + 1")
 # Esperado: O(n^2)
 
 # Prueba DP 6: DP 1D con while log interno (O(n log n))
@@ -564,221 +496,174 @@ end
 
 
 
-# --- Ejecución de todas las pruebas ---
-print("="*40)
-print("Prueba 1: Análisis del Algoritmo Constante")
-print(analizar_complejidad(algo_constante)) # Esperado: O(1)
-print("="*40)
-
-print("\nPrueba 2: Análisis del Algoritmo Lineal (FOR)")
-print(analizar_complejidad(algo_lineal)) # Esperado: O(n)
-print("="*40)
-
-print("\nPrueba 3: Análisis del Algoritmo Cuadrático")
-print(analizar_complejidad(algo_cuadratico)) # Esperado: O(n^2)
-print("="*40)
-
-print("\nPrueba 4: Análisis del Algoritmo Condicional")
-print(analizar_complejidad(algo_condicional)) # Esperado: Peor O(n), Mejor Ω(1)
-print("="*40)
-
-print("\nPrueba 5: Análisis del Bucle WHILE Lineal")
-print(analizar_complejidad(algo_while_lineal)) # Esperado: O(n)
-print("="*40)
-
-print("\nPrueba 6: Análisis del Bucle REPEAT Logarítmico")
-print(analizar_complejidad(algo_repeat_log)) # Esperado: O(log n)
-print("="*40)
-
-print("="*40)
-print("Prueba 7: Análisis de Búsqueda Binaria Recursiva")
-print(analizar_complejidad(algo_busqueda_binaria, nombre_funcion="algoritmo"))
-print("="*40)
-
-print("\nPrueba 8: Análisis de Merge Sort")
-print(analizar_complejidad(algo_merge_sort, nombre_funcion="algoritmo"))
-print("="*40)
-
-print("="*40)
-print("Prueba 9: Análisis de Búsqueda Lineal en Arreglo")
-print(analizar_complejidad(algo_busqueda_arreglo))
-print("="*40)
-
-# --- Ejecución de las nuevas pruebas ---
-print("="*40)
-print("Prueba 10: Análisis con Declaraciones de Variables y Objetos")
-print(analizar_complejidad(algo_con_declaraciones))
-print("="*40)
-
-print("\nPrueba 11: Análisis Lineal con Declaraciones")
-print(analizar_complejidad(algo_lineal_con_declaraciones))
-print("="*40)
-
-print("="*40)
-print("Prueba 12: Bucle Lineal con CALL O(1)")
-print(analizar_complejidad(algo_call_o1))
-print("="*40)
-
-print("\nPrueba 13: Bucle Lineal con CALL O(n)")
-print(analizar_complejidad(algo_call_on))
-print("="*40)
+# Todas las pruebas en orden de definición, como tuplas paralelas de nombres y
+# textos; las listas son explícitas, así que una prueba nueva se añade aquí también.
+# Los textos se internan: cuerpos idénticos comparten un único objeto, así las
+# comparaciones y hashes del lote (y de cualquier caché) son por identidad.
+# Los nombres algo_* se mantienen como alias para quien los importa uno a uno.
+# Se recortan los saltos de línea de los extremos; la sangría interior se conserva
+# porque es lo que ven la interfaz y el LLM.
+ALGOS = tuple(sys.intern(texto.strip()) for texto in (
+    algo_constante, algo_lineal, algo_cuadratico, algo_condicional, algo_while_lineal,
+    algo_repeat_log, algo_busqueda_binaria, algo_merge_sort, algo_busqueda_arreglo,
+    algo_con_declaraciones, algo_lineal_con_declaraciones, algo_call_o1, algo_call_on,
+    algo_call_anidado, algo_call_merge_sort_detallado, algo_for_n2, algo_cubico,
+    algo_while_log, algo_for_con_log_interno, algo_if_balanceado, algo_for_length_m,
+    algo_for_y_for_interno, algo_repeat_log_base3, algo_while_length, algo_call_swap_n2,
+    algo_mixto_call_y_log, algo_if_pesado, algo_for_m, algo_for_n_y_m,
+    algo_recursion_3_llamadas, algo_dp_1d, algo_dp_2d, algo_dp_memo_1d, algo_dp_memo_2d,
+    algo_dp_2d_n2, algo_dp_1d_log, algo_bnb_subsets, algo_bnb_tsp, algo_bnb_knapsack,
+))
+(
+    algo_constante, algo_lineal, algo_cuadratico, algo_condicional, algo_while_lineal,
+    algo_repeat_log, algo_busqueda_binaria, algo_merge_sort, algo_busqueda_arreglo,
+    algo_con_declaraciones, algo_lineal_con_declaraciones, algo_call_o1, algo_call_on,
+    algo_call_anidado, algo_call_merge_sort_detallado, algo_for_n2, algo_cubico,
+    algo_while_log, algo_for_con_log_interno, algo_if_balanceado, algo_for_length_m,
+    algo_for_y_for_interno, algo_repeat_log_base3, algo_while_length, algo_call_swap_n2,
+    algo_mixto_call_y_log, algo_if_pesado, algo_for_m, algo_for_n_y_m,
+    algo_recursion_3_llamadas, algo_dp_1d, algo_dp_2d, algo_dp_memo_1d, algo_dp_memo_2d,
+    algo_dp_2d_n2, algo_dp_1d_log, algo_bnb_subsets, algo_bnb_tsp, algo_bnb_knapsack,
+) = ALGOS
+ALGO_NOMBRES = (
+    "algo_constante", "algo_lineal", "algo_cuadratico", "algo_condicional",
+    "algo_while_lineal", "algo_repeat_log", "algo_busqueda_binaria", "algo_merge_sort",
+    "algo_busqueda_arreglo", "algo_con_declaraciones", "algo_lineal_con_declaraciones",
+    "algo_call_o1", "algo_call_on", "algo_call_anidado",
+    "algo_call_merge_sort_detallado", "algo_for_n2", "algo_cubico", "algo_while_log",
+    "algo_for_con_log_interno", "algo_if_balanceado", "algo_for_length_m",
+    "algo_for_y_for_interno", "algo_repeat_log_base3", "algo_while_length",
+    "algo_call_swap_n2", "algo_mixto_call_y_log", "algo_if_pesado", "algo_for_m",
+    "algo_for_n_y_m", "algo_recursion_3_llamadas", "algo_dp_1d", "algo_dp_2d",
+    "algo_dp_memo_1d", "algo_dp_memo_2d", "algo_dp_2d_n2", "algo_dp_1d_log",
+    "algo_bnb_subsets", "algo_bnb_tsp", "algo_bnb_knapsack",
+)
 
-print("\nPrueba 14: Bucle O(n^2) con CALL O(1)")
-print(analizar_complejidad(algo_call_anidado))
-print("="*40)
 
-print("\nPrueba 15: Recursivo con CALL O(n) en f(n)")
-print(analizar_complejidad(algo_call_merge_sort_detallado, nombre_funcion="algoritmo"))
-print("="*40)
-
-
-
-# --- Ejecución de las pruebas 16–30 ---
-print("="*40)
-print("Prueba 16: For con límite n^2")
-print(analizar_complejidad(algo_for_n2))
-print("="*40)
-
-print("Prueba 17: Triple bucle anidado")
-print(analizar_complejidad(algo_cubico))
-print("="*40)
-
-print("Prueba 18: While halving (log n)")
-print(analizar_complejidad(algo_while_log))
-print("="*40)
-
-print("Prueba 19: For con log interno")
-print(analizar_complejidad(algo_for_con_log_interno))
-print("="*40)
-
-print("Prueba 20: If-else equilibrado")
-print(analizar_complejidad(algo_if_balanceado))
-print("="*40)
-
-print("Prueba 21: For sobre length(B)")
-print(analizar_complejidad(algo_for_length_m))
-print("="*40)
-
-print("Prueba 22: For + for interno")
-print(analizar_complejidad(algo_for_y_for_interno))
-print("="*40)
-
-print("Prueba 23: Repeat multiplicando por 3")
-print(analizar_complejidad(algo_repeat_log_base3))
-print("="*40)
+# --- Ejecución de todas las pruebas ---
+# (título, pseudocódigo, nombre de la función recursiva o None)
+PRUEBAS = [
+    ("Prueba 1: Análisis del Algoritmo Constante", algo_constante, None), # Esperado: O(1)
+    ("Prueba 2: Análisis del Algoritmo Lineal (FOR)", algo_lineal, None), # Esperado: O(n)
+    ("Prueba 3: Análisis del Algoritmo Cuadrático", algo_cuadratico, None), # Esperado: O(n^2)
+    ("Prueba 4: Análisis del Algoritmo Condicional", algo_condicional, None), # Esperado: Peor O(n), Mejor Ω(1)
+    ("Prueba 5: Análisis del Bucle WHILE Lineal", algo_while_lineal, None), # Esperado: O(n)
+    ("Prueba 6: Análisis del Bucle REPEAT Logarítmico", algo_repeat_log, None), # Esperado: O(log n)
+    ("Prueba 7: Análisis de Búsqueda Binaria Recursiva", algo_busqueda_binaria, "algoritmo"),
+    ("Prueba 8: Análisis de Merge Sort", algo_merge_sort, "algoritmo"),
+    ("Prueba 9: Análisis de Búsqueda Lineal en Arreglo", algo_busqueda_arreglo, None),
+    ("Prueba 10: Análisis con Declaraciones de Variables y Objetos", algo_con_declaraciones, None),
+    ("Prueba 11: Análisis Lineal con Declaraciones", algo_lineal_con_declaraciones, None),
+    ("Prueba 12: Bucle Lineal con CALL O(1)", algo_call_o1, None),
+    ("Prueba 13: Bucle Lineal con CALL O(n)", algo_call_on, None),
+    ("Prueba 14: Bucle O(n^2) con CALL O(1)", algo_call_anidado, None),
+    ("Prueba 15: Recursivo con CALL O(n) en f(n)", algo_call_merge_sort_detallado, "algoritmo"),
+    ("Prueba 16: For con límite n^2", algo_for_n2, None),
+    ("Prueba 17: Triple bucle anidado", algo_cubico, None),
+    ("Prueba 18: While halving (log n)", algo_while_log, None),
+    ("Prueba 19: For con log interno", algo_for_con_log_interno, None),
+    ("Prueba 20: If-else equilibrado", algo_if_balanceado, None),
+    ("Prueba 21: For sobre length(B)", algo_for_length_m, None),
+    ("Prueba 22: For + for interno", algo_for_y_for_interno, None),
+    ("Prueba 23: Repeat multiplicando por 3", algo_repeat_log_base3, None),
+    ("Prueba 24: While hasta length(A)", algo_while_length, None),
+    ("Prueba 25: Call swap en n^2", algo_call_swap_n2, None),
+    ("Prueba 26: Call O(n) + log interno en for", algo_mixto_call_y_log, None),
+    ("Prueba 27: If con rama n^2 y otra O(1)", algo_if_pesado, None),
+    ("Prueba 28: For hasta m", algo_for_m, None),
+    ("Prueba 29: Doble for n y m", algo_for_n_y_m, None),
+    ("Prueba 30: Recursión 3 llamadas + trabajo lineal", algo_recursion_3_llamadas, "algoritmo"),
+    ("DP 1: Tabla 1D con for n", algo_dp_1d, None),
+    ("DP 2: Tabla 2D con doble for", algo_dp_2d, None),
+    ("DP 3: Memoización 1D sin bucles", algo_dp_memo_1d, None),
+    ("DP 4: Memoización 2D sin bucles", algo_dp_memo_2d, None),
+    ("DP 5: 2D n x n con transiciones O(1)", algo_dp_2d_n2, None),
+    ("DP 6: 1D con while log interno", algo_dp_1d_log, None),
+    ("BnB 1: Subconjuntos con poda (bound >= best)", algo_bnb_subsets, "algoritmo"),
+    ("BnB 2: TSP con poda por lower bound", algo_bnb_tsp, "algoritmo"),
+    ("BnB 3: Knapsack con poda y n/2", algo_bnb_knapsack, "algoritmo"),
+]
+
+# juntar todas las pruebas en un string para pasarselo al llm como contexto.
+# El texto unido solo se construye (una vez) cuando alguien pide all_tests_code.
+_ALL_TESTS = (
+    "    USA EXCLUSIVAMENTE ESTA GRAMÁTICA PARA TODOS LOS EJEMPLOS \n",
+    "",
+    *ALGOS,
+)
 
-print("Prueba 24: While hasta length(A)")
-print(analizar_complejidad(algo_while_length))
-print("="*40)
 
-print("Prueba 25: Call swap en n^2")
-print(analizar_complejidad(algo_call_swap_n2))
-print("="*40)
+@functools.cache
+def _unir_pruebas():
+    return "\n\n".join(_ALL_TESTS)
 
-print("Prueba 26: Call O(n) + log interno en for")
-print(analizar_complejidad(algo_mixto_call_y_log))
-print("="*40)
 
-print("Prueba 27: If con rama n^2 y otra O(1)")
-print(analizar_complejidad(algo_if_pesado))
-print("="*40)
+def __getattr__(nombre):
+    if nombre == "all_tests_code":
+        return _unir_pruebas()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
-print("Prueba 28: For hasta m")
-print(analizar_complejidad(algo_for_m))
-print("="*40)
 
-print("Prueba 29: Doble for n y m")
-print(analizar_complejidad(algo_for_n_y_m))
-print("="*40)
+# Caché en disco de los resultados de la suite. Se invalida sola cuando cambia
+# el código del analizador (la versión es el hash de models/analizador.py).
+_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pruebas.cache.pkl")
 
-print("Prueba 30: Recursión 3 llamadas + trabajo lineal")
-print(analizar_complejidad(algo_recursion_3_llamadas, nombre_funcion="algoritmo"))
-print("="*40)
 
+def _version_analizador(analizador):
+    with open(analizador.__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
 
-# --- Ejecución DP ---
-print("="*40)
-print("DP 1: Tabla 1D con for n")
-print(analizar_complejidad(algo_dp_1d))
-print("="*40)
+def _cargar_cache(version):
+    try:
+        with open(_CACHE_PATH, "rb") as f:
+            datos = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return {}
+    if not isinstance(datos, dict) or datos.get("version") != version:
+        return {}
+    return datos.get("resultados", {})
 
-print("DP 2: Tabla 2D con doble for")
-print(analizar_complejidad(algo_dp_2d))
-print("="*40)
 
-print("DP 3: Memoización 1D sin bucles")
-print(analizar_complejidad(algo_dp_memo_1d))
-print("="*40)
+def _guardar_cache(version, resultados):
+    try:
+        with open(_CACHE_PATH, "wb") as f:
+            pickle.dump({"version": version, "resultados": resultados}, f)
+    except OSError:
+        pass  # Sin permisos de escritura: la caché es solo una optimización
 
-print("DP 4: Memoización 2D sin bucles")
-print(analizar_complejidad(algo_dp_memo_2d))
-print("="*40)
 
-print("DP 5: 2D n x n con transiciones O(1)")
-print(analizar_complejidad(algo_dp_2d_n2))
-print("="*40)
+def _requiere_memo(pseudocodigo):
+    """Solo se memoizan pruebas recursivas o con bucles anidados; en las triviales no compensa."""
+    return "CALL" in pseudocodigo or pseudocodigo.count("for ") + pseudocodigo.count("while ") > 1
 
-print("DP 6: 1D con while log interno")
-print(analizar_complejidad(algo_dp_1d_log))
-print("="*40)
 
+def ejecutar_pruebas(paralelo=False, usar_cache=True):
+    """Analiza todas las pruebas de PRUEBAS e imprime sus resultados en orden."""
+    # Import diferido: quien solo usa los textos algo_* o all_tests_code
+    # (UI, helpers del LLM) no carga el analizador.
+    from models import analizador
 
+    entradas = [(pseudocodigo, nombre_funcion or "algoritmo") for _, pseudocodigo, nombre_funcion in PRUEBAS]
 
-print("="*40)
-print("BnB 1: Subconjuntos con poda (bound >= best)")
-print(analizar_complejidad(algo_bnb_subsets, nombre_funcion="algoritmo"))
-print("="*40)
+    version = _version_analizador(analizador) if usar_cache else None
+    cache = _cargar_cache(version) if usar_cache else {}
+    faltantes = list(dict.fromkeys(e for e in entradas if e not in cache))
+    if faltantes:
+        lote = [(pseudocodigo, nombre_funcion, _requiere_memo(pseudocodigo)) for pseudocodigo, nombre_funcion in faltantes]
+        cache.update(zip(faltantes, analizador.analizar_complejidad_batch(lote, paralelo=paralelo)))
+        if usar_cache:
+            _guardar_cache(version, cache)
 
-print("BnB 2: TSP con poda por lower bound")
-print(analizar_complejidad(algo_bnb_tsp, nombre_funcion="algoritmo"))
-print("="*40)
+    # Se arma el reporte completo (un bloque por prueba) y se escribe de una vez
+    separador = "="*40
+    reporte = "".join(
+        f"{separador}\n{titulo}\n{cache[entrada]}\n"
+        for (titulo, _, _), entrada in zip(PRUEBAS, entradas)
+    )
+    sys.stdout.write(f"{reporte}{separador}\n")
 
-print("BnB 3: Knapsack con poda y n/2")
-print(analizar_complejidad(algo_bnb_knapsack, nombre_funcion="algoritmo"))
-print("="*40)
 
-# juntar todas las pruebas en un string para pasarselo al llm como contexto
-all_tests_code = "\n\n".join([
-    "    USA EXCLUSIVAMENTE ESTA GRAMÁTICA PARA TODOS LOS EJEMPLOS \n",
-    "",
-    algo_constante,
-    algo_lineal,
-    algo_cuadratico,
-    algo_condicional,
-    algo_while_lineal,
-    algo_repeat_log,
-    algo_busqueda_binaria,
-    algo_merge_sort,
-    algo_busqueda_arreglo,
-    algo_con_declaraciones,
-    algo_lineal_con_declaraciones,
-    algo_call_o1,
-    algo_call_on,
-    algo_call_anidado,
-    algo_call_merge_sort_detallado,
-    algo_for_n2,
-    algo_cubico,
-    algo_while_log,
-    algo_for_con_log_interno,
-    algo_if_balanceado,
-    algo_for_length_m,
-    algo_for_y_for_interno,
-    algo_repeat_log_base3,
-    algo_while_length,
-    algo_call_swap_n2,
-    algo_mixto_call_y_log,
-    algo_if_pesado,
-    algo_for_m,
-    algo_for_n_y_m,
-    algo_recursion_3_llamadas,
-    algo_dp_1d,
-    algo_dp_2d,
-    algo_dp_memo_1d,
-    algo_dp_memo_2d,
-    algo_dp_2d_n2,
-    algo_dp_1d_log,
-    algo_bnb_subsets,
-    algo_bnb_tsp,
-    algo_bnb_knapsack
-])
\ No newline at end of file
+# Uso: python -m data.pruebas [--paralelo] [--sin-cache]
+if __name__ == "__main__":
+    ejecutar_pruebas(paralelo="--paralelo" in sys.argv, usar_cache="--sin-cache" not in sys.argv)
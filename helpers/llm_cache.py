@@ -0,0 +1,86 @@
+# llm_cache.py
+# Caché exacta de respuestas LLM. La usan los dos helpers: llm_helper2 (Groq, con
+# la clave de cache_key) y llm_helper (Gemini, solo en memoria y con clave propia).
+# - La clave es un sha256 de (modelo, prompts, temperatura, max_tokens).
+# - Solo se cachean llamadas de temperatura baja: con temperatura alta la
+#   respuesta no es reproducible y servirla de caché cambiaría el comportamiento.
+# - Nivel 1 en memoria (LRU con TTL); nivel 2 opcional en disco con diskcache,
+#   para sobrevivir a reinicios del servidor de Streamlit.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DIRECTORIO_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "ada_llm")
+
+
+class LLMCache:
+    def __init__(self, max_entradas=256, temperatura_max=0.2, directorio=DIRECTORIO_CACHE):
+        self.max_entradas = max_entradas
+        self.temperatura_max = temperatura_max
+        self._memoria = OrderedDict()  # clave -> (instante de expiración, valor)
+        # Se usa desde hilos del pool y desde varias sesiones de Streamlit a la vez
+        self._lock = threading.Lock()
+        self._disco = None
+        if diskcache is not None and directorio:
+            try:
+                self._disco = diskcache.Cache(directorio)
+            except Exception:
+                self._disco = None
+
+    def cache_key(self, model, system_prompt, user_prompt, temperature, max_tokens=None):
+        """Clave de la llamada, o None si no debe cachearse (temperatura alta)."""
+        if temperature > self.temperatura_max:
+            return None
+        datos = [model, system_prompt, user_prompt, temperature, max_tokens]
+        if orjson:
+            crudo = orjson.dumps(datos)
+        else:
+            crudo = json.dumps(datos, ensure_ascii=False).encode()
+        return hashlib.sha256(crudo).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            guardado = self._memoria.get(key)
+            if guardado is not None:
+                if guardado[0] > time.time():
+                    self._memoria.move_to_end(key)
+                    return guardado[1]
+                del self._memoria[key]
+        if self._disco is not None:
+            try:
+                valor = self._disco.get(key)
+            except Exception:  # entrada corrupta o base bloqueada: se trata como fallo
+                valor = None
+            if valor is not None:
+                self._guardar_en_memoria(key, valor, 3600)
+                return valor
+        return None
+
+    def set(self, key, valor, ttl=86400):
+        self._guardar_en_memoria(key, valor, ttl)
+        if self._disco is not None:
+            try:
+                self._disco.set(key, valor, expire=ttl)
+            except Exception:
+                pass
+
+    def _guardar_en_memoria(self, key, valor, ttl):
+        with self._lock:
+            self._memoria[key] = (time.time() + ttl, valor)
+            self._memoria.move_to_end(key)
+            while len(self._memoria) > self.max_entradas:
+                self._memoria.popitem(last=False)
@@ -1,12 +1,26 @@
 # llm_helper.py
 
+import functools
+import hashlib
 import streamlit as st
 import google.generativeai as genai
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+import json
 import re
 import os
+import random
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
+from helpers.llm_cache import LLMCache
+
+# orjson (opcional) decodifica las respuestas bastante más rápido que json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Importa los ejemplos como contexto desde data/pruebas.py
 try:
@@ -14,8 +28,6 @@ try:
 except Exception:
     all_tests_code = ""  # Fallback si no está disponible
 
-print(all_tests_code)
-
 # Cargar variables de entorno desde .env
 load_dotenv()
 
@@ -34,24 +46,59 @@ GRAMATICA_PROYECTO = """
 # Ejemplos de referencia del analizador (texto largo)
 EJEMPLOS_PSEUDOCODIGO = all_tests_code
 
+# Patrones de compresión de ejemplos (compilados una sola vez)
+RE_LINEAS_VACIAS = re.compile(r'\n\s*\n+')
+RE_COMENTARIO_LARGO = re.compile(r'#[^\n]{100,}')
+RE_ESPACIO_FINAL = re.compile(r'[ \t]+$', re.MULTILINE)
+
+# Secciones del prompt de sistema
+RE_SECCION_GRAMATICA = re.compile(r'\[GRAMÁTICA\](.*?)\[EJEMPLOS', re.DOTALL)
+RE_SECCION_EJEMPLOS = re.compile(r'\[EJEMPLOS COMPLETOS\](.*?)\[REGLAS\]', re.DOTALL)
+RE_SECCION_REGLAS = re.compile(r'\[REGLAS\](.*)', re.DOTALL)
+
+# Patrones de limpieza/validación de respuestas del LLM (compilados una sola vez)
+RE_BLOQUE_DOT = re.compile(r'```(?:dot|graphviz)?\n?(.*?)```', re.DOTALL)
+RE_LLAMADA_RECURSIVA = re.compile(r'\bCALL\s+algoritmo\b')
+# Líneas que respetan la gramática: begin/end solos, comentario ►, palabra clave al
+# inicio (sin distinguir mayúsculas), asignación, length(...) o acceso a arreglo.
+# Un solo findall sobre todo el texto en vez de un bucle Python por línea.
+RE_LINEAS_GRAMATICA = re.compile(
+    r'^(?='
+    r'[^\S\n]*(?:(?:begin|end)[^\S\n]*$|►|(?i:for|while|repeat|until|if|else|return|CALL)\b)'
+    r'|[^\n]*?(?:🡨|\blength\(\w+\)\b|\w+[^\S\n]*\[[^\S\n]*\w+[^\S\n]*\])'
+    r')[^\n]*',
+    re.MULTILINE
+)
+RE_BEGIN = re.compile(r'^\s*begin\s*$', re.MULTILINE)
+RE_END = re.compile(r'^\s*end\s*$', re.MULTILINE)
+
+def _comprimir_ejemplos(ejemplos_raw):
+    """Quita líneas vacías y comentarios verbose, y limita a ~20KB (aprox 5000 tokens)."""
+    # Quitar múltiples saltos de línea consecutivos
+    ejemplos = RE_LINEAS_VACIAS.sub('\n', ejemplos_raw)
+    # Quitar comentarios muy largos (mantener solo ►)
+    ejemplos = RE_COMENTARIO_LARGO.sub('', ejemplos)
+    # Quitar espacios al final de línea (no aportan nada y cuestan tokens)
+    ejemplos = RE_ESPACIO_FINAL.sub('', ejemplos)
+    if len(ejemplos) > 20000:
+        ejemplos = ejemplos[:20000] + "\n# ... (ejemplos adicionales truncados)"
+    return ejemplos
+
+# Los ejemplos no cambian durante la vida del proceso: se comprimen una sola vez
+EJEMPLOS_COMPRIMIDOS = _comprimir_ejemplos(all_tests_code or "")
+
 # Sistema: construir prompt fijo con TODOS los ejemplos optimizados
+@functools.lru_cache(maxsize=2)
 def build_system_prompt(incluir_ejemplos_completos=True):
     """
     Construye el prompt de sistema con todos los ejemplos.
     Optimiza el formato para reducir tokens sin perder información.
+    Se memoiza por valor del flag: solo hay dos prompts posibles.
     """
     if not incluir_ejemplos_completos:
         ejemplos = "Ver ejemplos en contexto de la conversación."
     else:
-        # COMPRIMIR ejemplos: quitar líneas vacías, comentarios verbose
-        ejemplos_raw = all_tests_code or ""
-        # Quitar múltiples saltos de línea consecutivos
-        ejemplos = re.sub(r'\n\s*\n+', '\n', ejemplos_raw)
-        # Quitar comentarios muy largos (mantener solo ►)
-        ejemplos = re.sub(r'#[^\n]{100,}', '', ejemplos)
-        # Limitar a ~20KB de ejemplos (aprox 5000 tokens)
-        if len(ejemplos) > 20000:
-            ejemplos = ejemplos[:20000] + "\n# ... (ejemplos adicionales truncados)"
+        ejemplos = EJEMPLOS_COMPRIMIDOS
     
     return f"""[SYSTEM]
 Experto en ADA. RESPETA la gramática de los ejemplos.
@@ -70,6 +117,28 @@ Experto en ADA. RESPETA la gramática de los ejemplos.
 
 SYSTEM_PROMPT = build_system_prompt(incluir_ejemplos_completos=True)
 
+def _dividir_prompt(system_prompt):
+    """
+    Separa el prompt en (núcleo de sistema, ejemplos) para cuando no cabe
+    completo en systemInstruction: gramática + reglas por un lado, ejemplos por otro.
+    """
+    gramatica_match = RE_SECCION_GRAMATICA.search(system_prompt)
+    ejemplos_match = RE_SECCION_EJEMPLOS.search(system_prompt)
+    reglas_match = RE_SECCION_REGLAS.search(system_prompt)
+    
+    system_core = f"""[SYSTEM]
+Experto en ADA. RESPETA la gramática de los ejemplos.
+
+{gramatica_match.group(1) if gramatica_match else GRAMATICA_PROYECTO}
+
+{reglas_match.group(1) if reglas_match else ""}
+"""
+    ejemplos_text = ejemplos_match.group(1) if ejemplos_match else ""
+    return system_core.strip(), ejemplos_text.strip()
+
+# SYSTEM_PROMPT es constante: su división se calcula una sola vez al importar
+SYSTEM_CORE, EJEMPLOS_TEXT = _dividir_prompt(SYSTEM_PROMPT)
+
 def configurar_llm():
     """
     Configura y devuelve la API Key de Gemini desde variables de entorno.
@@ -93,67 +162,210 @@ MODEL_CONFIGS = [
     ('v1beta', 'gemini-2.5-flash'),
 ]
 
-def _post(url, headers, data, retries=3):
-    """POST con reintentos exponenciales ante 429/5xx."""
+# Cliente HTTP compartido: reutiliza conexiones TCP/TLS entre llamadas (y entre
+# reruns de Streamlit). Con httpx + h2 instalados se usa HTTP/2, que multiplexa las
+# peticiones concurrentes sobre una sola conexión; si no, una requests.Session con pool.
+# En ambos casos los reintentos los gestiona _post.
+try:
+    import httpx
+    _SESSION = httpx.Client(
+        http2=True,
+        timeout=30.0,
+        headers={'Content-Type': 'application/json'},
+        limits=httpx.Limits(max_connections=8, max_keepalive_connections=8),
+    )
+    _HTTPX = True
+    # Errores de transporte (red, timeouts, JSON inválido) que se tratan como fallo del modelo
+    _ERRORES_RED = (httpx.HTTPError, requests.RequestException, ValueError)
+except ImportError:  # httpx o h2 no instalados
+    _SESSION = requests.Session()
+    _SESSION.headers.update({'Content-Type': 'application/json'})
+    _SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=0)))
+    _HTTPX = False
+    _ERRORES_RED = (requests.RequestException, ValueError)
+
+def _post_stream(url, data):
+    """POST en streaming; el llamador debe cerrar la respuesta."""
+    if _HTTPX:
+        return _SESSION.send(_SESSION.build_request("POST", url, json=data), stream=True)
+    return _SESSION.post(url, json=data, timeout=30, stream=True)
+
+def _lineas_stream(response):
+    return response.iter_lines() if _HTTPX else response.iter_lines(decode_unicode=True)
+
+def _texto_stream(response):
+    if _HTTPX:
+        response.read()
+    return response.text
+
+def _retry_after(resp):
+    """Segundos indicados por la cabecera Retry-After, o None si no es numérica."""
+    try:
+        return float(resp.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+# Espera máxima entre reintentos de _post (la misma cota que en llm_helper2)
+ESPERA_MAX_REINTENTO = 8.0
+
+def _post(url, data, retries=3):
+    """
+    POST con reintentos exponenciales ante 429/5xx.
+    Respeta Retry-After si el servidor lo envía; si pide esperar más de
+    ESPERA_MAX_REINTENTO se devuelve la respuesta sin reintentar, para que el
+    llamador marque el enfriamiento y pase al siguiente modelo en vez de bloquear
+    el script. Sin Retry-After se añade jitter a la espera para que clientes que
+    comparten cuota no reintenten todos a la vez.
+    """
     delay = 1.0
     for intento in range(retries):
-        resp = requests.post(url, headers=headers, json=data, timeout=30)
+        resp = _SESSION.post(url, json=data, timeout=30)
         if resp.status_code in (429, 500, 502, 503, 504) and intento < retries - 1:
-            time.sleep(delay)
-            delay = min(delay * 2, 8.0)
+            espera = _retry_after(resp)
+            if espera is not None:
+                if espera > ESPERA_MAX_REINTENTO:
+                    return resp
+                time.sleep(espera)
+            else:
+                time.sleep(delay + random.uniform(0, delay * 0.3))
+            delay = min(delay * 2, ESPERA_MAX_REINTENTO)
             continue
         return resp
     return resp
 
-def _build_payload(system_prompt: str, user_text: str, max_tokens=8192, stop_sequences=None, temperature=0.1, api_version='v1beta'):
+def _json(resp):
+    """Cuerpo JSON de la respuesta, con orjson si está instalado."""
+    return orjson.loads(resp.content) if orjson else resp.json()
+
+# Enfriamiento por (api_version, modelo) tras un 429: mientras dure, el modelo se
+# salta directamente en vez de gastar otra ronda de reintentos contra la misma cuota.
+ENFRIAMIENTO_429 = 60.0
+_ENFRIAMIENTOS = {}
+
+def _en_enfriamiento(api_version, model_name):
+    return time.monotonic() < _ENFRIAMIENTOS.get((api_version, model_name), 0.0)
+
+def _marcar_enfriamiento(api_version, model_name, resp):
+    espera = _retry_after(resp)
+    _ENFRIAMIENTOS[(api_version, model_name)] = time.monotonic() + (espera if espera is not None else ENFRIAMIENTO_429)
+
+# Caché de contexto de Gemini (CachedContent): el SYSTEM_PROMPT se sube una vez
+# por modelo y las llamadas siguientes solo lo referencian por nombre.
+CACHED_CONTENTS_URL = "https://generativelanguage.googleapis.com/v1beta/cachedContents"
+CACHED_CONTENT_TTL = 3600
+SYSTEM_PROMPT_HASH = hashlib.blake2b(SYSTEM_PROMPT.encode(), digest_size=16).hexdigest()
+_CONTEXTOS_CACHEADOS = {}  # (hash de la key, model_name, hash del prompt) -> ("cachedContents/<id>" o None, expira)
+ESTADISTICAS_CACHE = {"hits": 0, "misses": 0}
+
+def _clave_contexto(api_key, model_name):
+    """Una CachedContent pertenece al proyecto de la key que la creó: la clave incluye un hash de la key."""
+    return (hashlib.blake2b(api_key.encode(), digest_size=8).hexdigest(), model_name, SYSTEM_PROMPT_HASH)
+
+def _ensure_cached_context(api_key, model_name):
+    """
+    Devuelve el nombre de la caché de contexto del modelo, creándola si hace falta.
+    Se renueva un minuto antes de que venza su TTL en Gemini. Si Gemini la rechaza
+    (p. ej. prompt por debajo del mínimo de tokens) se recuerda como None hasta el
+    siguiente vencimiento y se sigue enviando el prompt completo.
+    """
+    clave = _clave_contexto(api_key, model_name)
+    nombre, expira = _CONTEXTOS_CACHEADOS.get(clave, (None, 0.0))
+    if time.monotonic() < expira:
+        ESTADISTICAS_CACHE["hits" if nombre else "misses"] += 1
+        return nombre
+    ESTADISTICAS_CACHE["misses"] += 1
+    nombre = None
+    try:
+        resp = _post(
+            f"{CACHED_CONTENTS_URL}?key={api_key}",
+            {
+                "model": f"models/{model_name}",
+                "systemInstruction": { "parts": [ { "text": SYSTEM_PROMPT } ] },
+                "ttl": f"{CACHED_CONTENT_TTL}s",
+            },
+        )
+        if resp.status_code == 200:
+            nombre = _json(resp).get("name")
+    except _ERRORES_RED:
+        pass
+    _CONTEXTOS_CACHEADOS[clave] = (nombre, time.monotonic() + CACHED_CONTENT_TTL - 60)
+    return nombre
+
+def tasa_aciertos_cache():
+    """Proporción de llamadas que reutilizaron la caché de contexto (None si aún no hubo llamadas)."""
+    total = ESTADISTICAS_CACHE["hits"] + ESTADISTICAS_CACHE["misses"]
+    return ESTADISTICAS_CACHE["hits"] / total if total else None
+
+def _descartar_cache(data, api_key, model_name):
+    """
+    La caché expiró, fue borrada (404) o no es accesible con esta key (403): se
+    olvida y el payload vuelve a llevar el prompt completo.
+    """
+    _CONTEXTOS_CACHEADOS.pop(_clave_contexto(api_key, model_name), None)
+    del data["cachedContent"]
+    data["systemInstruction"] = { "parts": [ { "text": SYSTEM_PROMPT } ] }
+
+# Partes constantes del payload: se construyen una vez y se reutilizan en cada llamada
+SAFETY_SETTINGS = [
+    {"category": categoria, "threshold": "BLOCK_NONE"}
+    for categoria in (
+        "HARM_CATEGORY_HARASSMENT",
+        "HARM_CATEGORY_HATE_SPEECH",
+        "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "HARM_CATEGORY_DANGEROUS_CONTENT",
+    )
+]
+GENERATION_CONFIG_BASE = {"topP": 0.8, "topK": 40, "candidateCount": 1}
+
+def _build_payload(system_prompt: str, user_text: str, max_tokens=8192, stop_sequences=None, temperature=0.1, api_version='v1beta', cached_content=None):
     """
     Construye payload. Si system_prompt es muy grande (>30KB), 
     lo divide entre systemInstruction y el primer mensaje user.
+    Con cached_content (v1beta) el prompt de sistema ya vive en la caché de Gemini
+    y solo se envía el texto del usuario.
     """
     # Límite de systemInstruction: ~30KB (seguro para v1beta)
     MAX_SYSTEM_SIZE = 30000
+    generation_config = {
+        **GENERATION_CONFIG_BASE,
+        "temperature": temperature,
+        "maxOutputTokens": max_tokens,
+        "stopSequences": stop_sequences or []
+    }
     
     if api_version == 'v1beta':
+        if cached_content:
+            return {
+                "cachedContent": cached_content,
+                "contents": [
+                    { "role": "user", "parts": [ { "text": user_text } ] }
+                ],
+                "generationConfig": generation_config
+            }
         if len(system_prompt) > MAX_SYSTEM_SIZE:
             # ESTRATEGIA: Dividir en dos partes
             # Parte 1: Gramática + reglas en systemInstruction
             # Parte 2: Ejemplos completos en primer mensaje del user
             
-            # Extraer secciones
-            gramatica_match = re.search(r'\[GRAMÁTICA\](.*?)\[EJEMPLOS', system_prompt, re.DOTALL)
-            ejemplos_match = re.search(r'\[EJEMPLOS COMPLETOS\](.*?)\[REGLAS\]', system_prompt, re.DOTALL)
-            reglas_match = re.search(r'\[REGLAS\](.*)', system_prompt, re.DOTALL)
-            
-            system_core = f"""[SYSTEM]
-Experto en ADA. RESPETA la gramática de los ejemplos.
-
-{gramatica_match.group(1) if gramatica_match else GRAMATICA_PROYECTO}
-
-{reglas_match.group(1) if reglas_match else ""}
-"""
-            
-            ejemplos_text = ejemplos_match.group(1) if ejemplos_match else ""
+            # Secciones precalculadas si es el prompt del módulo
+            if system_prompt is SYSTEM_PROMPT:
+                system_core, ejemplos_text = SYSTEM_CORE, EJEMPLOS_TEXT
+            else:
+                system_core, ejemplos_text = _dividir_prompt(system_prompt)
             
             # Combinar ejemplos con la tarea del usuario
             combined_user_text = f"""[CONTEXTO - EJEMPLOS DE REFERENCIA]
-{ejemplos_text.strip()}
+{ejemplos_text}
 
 ---
 {user_text}"""
             
             return {
-                "systemInstruction": { "parts": [ { "text": system_core.strip() } ] },
+                "systemInstruction": { "parts": [ { "text": system_core } ] },
                 "contents": [
                     { "role": "user", "parts": [ { "text": combined_user_text } ] }
                 ],
-                "generationConfig": {
-                    "temperature": temperature,
-                    "topP": 0.8,
-                    "topK": 40,
-                    "candidateCount": 1,
-                    "maxOutputTokens": max_tokens,
-                    "stopSequences": stop_sequences or []
-                }
+                "generationConfig": generation_config
             }
         else:
             # System prompt cabe completo en systemInstruction
@@ -162,14 +374,7 @@ Experto en ADA. RESPETA la gramática de los ejemplos.
                 "contents": [
                     { "role": "user", "parts": [ { "text": user_text } ] }
                 ],
-                "generationConfig": {
-                    "temperature": temperature,
-                    "topP": 0.8,
-                    "topK": 40,
-                    "candidateCount": 1,
-                    "maxOutputTokens": max_tokens,
-                    "stopSequences": stop_sequences or []
-                }
+                "generationConfig": generation_config
             }
     else:  # v1
         # v1 no soporta systemInstruction, todo va en user
@@ -178,16 +383,47 @@ Experto en ADA. RESPETA la gramática de los ejemplos.
             "contents": [
                 { "role": "user", "parts": [ { "text": combined_prompt } ] }
             ],
-            "generationConfig": {
-                "temperature": temperature,
-                "topP": 0.8,
-                "topK": 40,
-                "candidateCount": 1,
-                "maxOutputTokens": max_tokens,
-                "stopSequences": stop_sequences or []
-            }
+            "generationConfig": generation_config
         }
 
+# Caché de respuestas: Streamlit re-ejecuta el script en cada interacción y el módulo
+# sobrevive entre reruns, así que una consulta idéntica no vuelve a ir a la API.
+# La clave incluye el hash del SYSTEM_PROMPT: si cambia el prompt, cambian las claves.
+# Es la misma LLMCache de llm_helper2 (LRU con TTL y lock), aquí solo en memoria.
+RESPUESTAS_TTL = 3600.0
+RESPUESTAS_MAX = 256
+_RESPUESTAS = LLMCache(max_entradas=RESPUESTAS_MAX, directorio=None)
+
+def _clave_respuesta(tarea, entrada):
+    return hashlib.blake2b(f"{tarea}\0{entrada}".encode(), digest_size=16, key=bytes.fromhex(SYSTEM_PROMPT_HASH)).hexdigest()
+
+def _respuesta_cacheada(clave):
+    return _RESPUESTAS.get(clave)
+
+def _guardar_respuesta(clave, texto):
+    """Solo se guardan respuestas válidas; los mensajes de error se reintentan."""
+    if not texto or texto.startswith("❌"):
+        return
+    _RESPUESTAS.set(clave, texto, ttl=RESPUESTAS_TTL)
+
+def _cachear_respuesta(tarea):
+    """Decorador para funciones (api_key, entrada) -> texto: memoiza las respuestas válidas."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(api_key, entrada):
+            if api_key is None:
+                return funcion(api_key, entrada)
+            clave = _clave_respuesta(tarea, entrada)
+            cacheada = _respuesta_cacheada(clave)
+            if cacheada is not None:
+                return cacheada
+            resultado = funcion(api_key, entrada)
+            _guardar_respuesta(clave, resultado)
+            return resultado
+        return envoltura
+    return decorador
+
+@_cachear_respuesta("traducir")
 def traducir_a_pseudocodigo(api_key, texto_natural):
     """
     Traduce lenguaje natural a pseudocódigo con TODOS los ejemplos como contexto.
@@ -208,9 +444,14 @@ begin
 end"""
 
     for api_version, model_name in MODEL_CONFIGS:
+        if _en_enfriamiento(api_version, model_name):
+            errores.append(f"❌ {model_name}: Cuota agotada (en espera)")
+            continue
         try:
             url = f"https://generativelanguage.googleapis.com/{api_version}/models/{model_name}:generateContent?key={api_key}"
-            headers = {'Content-Type': 'application/json'}
+            
+            # Prompt de sistema desde la caché de contexto si está disponible
+            cache_name = _ensure_cached_context(api_key, model_name) if api_version == 'v1beta' else None
             
             # Payload con chunking automático de ejemplos
             data = _build_payload(
@@ -219,22 +460,22 @@ end"""
                 max_tokens=8192,
                 stop_sequences=None,
                 temperature=0.0,
-                api_version=api_version
+                api_version=api_version,
+                cached_content=cache_name
             )
             
             # Safety settings
             if api_version == 'v1beta':
-                data["safetySettings"] = [
-                    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-                ]
+                data["safetySettings"] = SAFETY_SETTINGS
             
-            response = _post(url, headers, data)
+            response = _post(url, data)
+            if response.status_code in (403, 404) and cache_name:
+                _descartar_cache(data, api_key, model_name)
+                cache_name = None
+                response = _post(url, data)
             
             if response.status_code == 200:
-                result = response.json()
+                result = _json(response)
                 
                 # Validación robusta
                 if 'candidates' not in result or len(result['candidates']) == 0:
@@ -267,8 +508,13 @@ end"""
                 st.success(f"✅ Traducción con {model_name} (contexto completo)")
                 limpio = limpiar_respuesta_llm(texto_respuesta)
 
-                # Validación y corrección
-                if not re.search(r'^\s*begin\s*$', limpio, re.MULTILINE) or not re.search(r'^\s*end\s*$', limpio, re.MULTILINE):
+                # Validación y corrección: begin/end faltantes se reparan localmente;
+                # solo se vuelve a consultar al LLM si no quedó cuerpo que envolver
+                if not RE_BEGIN.search(limpio):
+                    limpio = "begin\n" + limpio
+                if not RE_END.search(limpio):
+                    limpio = limpio + "\nend"
+                if all(l.strip() in ("begin", "end", "") for l in limpio.splitlines()):
                     prompt_fix = f"""CORRIGE para cumplir gramática exacta de ejemplos.
 
 Código:
@@ -276,13 +522,13 @@ Código:
 
 Devuelve SOLO begin...end válido."""
                     
-                    data_fix = _build_payload(SYSTEM_PROMPT, prompt_fix, max_tokens=8192, stop_sequences=None, temperature=0.0, api_version=api_version)
+                    data_fix = _build_payload(SYSTEM_PROMPT, prompt_fix, max_tokens=8192, stop_sequences=None, temperature=0.0, api_version=api_version, cached_content=cache_name)
                     if api_version == 'v1beta':
                         data_fix["safetySettings"] = data["safetySettings"]
                     
-                    resp_fix = _post(url, headers, data_fix)
+                    resp_fix = _post(url, data_fix)
                     if resp_fix.status_code == 200:
-                        result_fix = resp_fix.json()
+                        result_fix = _json(resp_fix)
                         if 'candidates' in result_fix and len(result_fix['candidates']) > 0:
                             cand = result_fix['candidates'][0]
                             if 'content' in cand and 'parts' in cand['content']:
@@ -293,11 +539,12 @@ Devuelve SOLO begin...end válido."""
                 return limpio
                 
             elif response.status_code == 429:
+                _marcar_enfriamiento(api_version, model_name, response)
                 errores.append(f"❌ {model_name}: Cuota agotada")
                 continue
             else:
                 try:
-                    error_msg = response.json().get('error', {}).get('message', response.text[:120])
+                    error_msg = _json(response).get('error', {}).get('message', response.text[:120])
                 except:
                     error_msg = response.text[:120]
                 errores.append(f"❌ {model_name}: HTTP {response.status_code} - {error_msg}")
@@ -317,26 +564,25 @@ def limpiar_respuesta_llm(texto):
     Quita ```plaintext ... ``` o ``` ... ```
     Y aplica un post-procesado para forzar la gramática mínima.
     """
-    match = re.search(r'```(?:plaintext\n)?(.*?)\n?```', texto, re.DOTALL)
-    if match:
-        texto = match.group(1).strip()
-
-    lineas = []
-    for linea in texto.splitlines():
-        s = linea.strip()
-        if s in ("begin", "end") or \
-           re.match(r'^(for|while|repeat|until|if|else|return|CALL)\b', s, re.IGNORECASE) or \
-           re.search(r'🡨', s) or \
-           re.search(r'\blength\(\w+\)\b', s) or \
-           re.search(r'\w+\s*\[\s*\w+\s*\]', s) or \
-           s.startswith("►"):
-            lineas.append(linea)
+    # Primer bloque ``` ... ``` con dos find() lineales (sin backtracking de regex)
+    inicio = texto.find("```")
+    if inicio != -1:
+        fin = texto.find("```", inicio + 3)
+        if fin != -1:
+            bloque = texto[inicio + 3:fin]
+            if bloque.startswith("plaintext\n"):
+                bloque = bloque[len("plaintext\n"):]
+            texto = bloque.strip()
+
+    # Se normalizan los saltos de línea (\r\n, etc.) igual que splitlines()
+    lineas = RE_LINEAS_GRAMATICA.findall("\n".join(texto.splitlines()))
 
     joined = "\n".join(lineas).strip()
     if "begin" not in joined or "end" not in joined:
         joined = "begin\n" + "\n".join(lineas) + "\nend"
     return joined.strip()
 
+@_cachear_respuesta("analisis")
 def obtener_analisis_llm(api_key, pseudocodigo):
     """
     Envía el pseudocódigo a Gemini usando systemInstruction (v1beta) o prompt combinado (v1).
@@ -345,46 +591,37 @@ def obtener_analisis_llm(api_key, pseudocodigo):
         return "❌ **Error:** La API Key no está configurada."
 
     errores = []
-    user_prompt = f"""[TAREA]
-Analiza el siguiente algoritmo y devuelve:
-1) Razonamiento breve
-2) Complejidad: Peor Caso (O), Mejor Caso (Ω) y Caso Promedio (Θ).
-[PSEUDOCÓDIGO]
-```plaintext
-{pseudocodigo}
-```
-
-[OUTPUT]
-- En Markdown, conciso.
-- No incluyas texto fuera del análisis.
-"""
+    user_prompt = _prompt_analisis(pseudocodigo)
 
     for api_version, model_name in MODEL_CONFIGS:
+        if _en_enfriamiento(api_version, model_name):
+            errores.append(f"❌ {model_name} ({api_version}): Cuota agotada (en espera)")
+            continue
         try:
             url = f"https://generativelanguage.googleapis.com/{api_version}/models/{model_name}:generateContent?key={api_key}"
-            headers = {'Content-Type': 'application/json'}
+            cache_name = _ensure_cached_context(api_key, model_name) if api_version == 'v1beta' else None
             data = _build_payload(
                 SYSTEM_PROMPT,
                 user_prompt,
                 max_tokens=8192,
                 stop_sequences=["```", "FIN_RESPUESTA"],
                 temperature=0.1,
-                api_version=api_version
+                api_version=api_version,
+                cached_content=cache_name
             )
             
             # AGREGAR SAFETY SETTINGS
             if api_version == 'v1beta':
-                data["safetySettings"] = [
-                    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-                ]
+                data["safetySettings"] = SAFETY_SETTINGS
             
-            response = _post(url, headers, data)
+            response = _post(url, data)
+            if response.status_code in (403, 404) and cache_name:
+                _descartar_cache(data, api_key, model_name)
+                cache_name = None
+                response = _post(url, data)
             
             if response.status_code == 200:
-                result = response.json()
+                result = _json(response)
                 
                 # VALIDACIÓN ROBUSTA
                 if 'candidates' not in result or len(result['candidates']) == 0:
@@ -411,8 +648,10 @@ Analiza el siguiente algoritmo y devuelve:
                 return texto_respuesta.strip()
                 
             else:
+                if response.status_code == 429:
+                    _marcar_enfriamiento(api_version, model_name, response)
                 try:
-                    error_detail = response.json().get('error', {}).get('message', response.text[:120])
+                    error_detail = _json(response).get('error', {}).get('message', response.text[:120])
                 except:
                     error_detail = response.text[:120]
                 errores.append(f"❌ {model_name} ({api_version}): HTTP {response.status_code} - {error_detail}")
@@ -424,11 +663,127 @@ Analiza el siguiente algoritmo y devuelve:
             errores.append(f"❌ {model_name} ({api_version}): {str(e)[:100]}")
             continue
 
+    return _mensaje_error_analisis(errores)
+
+def obtener_analisis_llm_stream(api_key, pseudocodigo):
+    """
+    Variante en streaming de obtener_analisis_llm (streamGenerateContent + SSE):
+    cede el texto a medida que Gemini lo genera, para usar con st.write_stream.
+    Una vez que un modelo empezó a responder ya no se hace failover.
+    """
+    if api_key is None:
+        yield "❌ **Error:** La API Key no está configurada."
+        return
+
+    # Comparte caché con obtener_analisis_llm: un análisis ya hecho se entrega de una vez
+    clave = _clave_respuesta("analisis", pseudocodigo)
+    cacheada = _respuesta_cacheada(clave)
+    if cacheada is not None:
+        yield cacheada
+        return
+
+    errores = []
+    user_prompt = _prompt_analisis(pseudocodigo)
+
+    for api_version, model_name in MODEL_CONFIGS:
+        if _en_enfriamiento(api_version, model_name):
+            errores.append(f"❌ {model_name} ({api_version}): Cuota agotada (en espera)")
+            continue
+        fragmentos = []
+        try:
+            url = f"https://generativelanguage.googleapis.com/{api_version}/models/{model_name}:streamGenerateContent?alt=sse&key={api_key}"
+            cache_name = _ensure_cached_context(api_key, model_name) if api_version == 'v1beta' else None
+            data = _build_payload(
+                SYSTEM_PROMPT,
+                user_prompt,
+                max_tokens=8192,
+                stop_sequences=["```", "FIN_RESPUESTA"],
+                temperature=0.1,
+                api_version=api_version,
+                cached_content=cache_name
+            )
+            
+            if api_version == 'v1beta':
+                data["safetySettings"] = SAFETY_SETTINGS
+            
+            response = _post_stream(url, data)
+            if response.status_code in (403, 404) and cache_name:
+                response.close()
+                _descartar_cache(data, api_key, model_name)
+                response = _post_stream(url, data)
+            
+            try:
+                if response.status_code != 200:
+                    if response.status_code == 429:
+                        _marcar_enfriamiento(api_version, model_name, response)
+                    errores.append(f"❌ {model_name} ({api_version}): HTTP {response.status_code} - {_texto_stream(response)[:120]}")
+                    continue
+                for fragmento in _leer_sse(_lineas_stream(response)):
+                    fragmentos.append(fragmento)
+                    yield fragmento
+            finally:
+                response.close()
+            
+            if fragmentos:
+                _guardar_respuesta(clave, "".join(fragmentos).strip())
+                return
+            errores.append(f"❌ {model_name} ({api_version}): Respuesta vacía")
+                
+        except Exception as e:
+            if fragmentos:
+                # El modelo ya empezó a responder: se marca el corte en vez de dar
+                # por completo un análisis truncado (tampoco se guarda en caché)
+                yield f"\n\n❌ Respuesta interrumpida ({model_name}: {str(e)[:100]})"
+                return
+            errores.append(f"❌ {model_name} ({api_version}): {str(e)[:100]}")
+            continue
+
+    yield _mensaje_error_analisis(errores)
+
+def _leer_sse(lineas):
+    """Extrae el texto de cada evento 'data: {...}' de una respuesta SSE de Gemini."""
+    for linea in lineas:
+        if not linea or not linea.startswith("data:"):
+            continue
+        evento = orjson.loads(linea[5:]) if orjson else json.loads(linea[5:])
+        for candidate in evento.get('candidates', [])[:1]:
+            if candidate.get('finishReason') == 'SAFETY':
+                return
+            for part in candidate.get('content', {}).get('parts', []):
+                if part.get('text'):
+                    yield part['text']
+
+def _prompt_analisis(pseudocodigo):
+    return f"""[TAREA]
+Analiza el siguiente algoritmo y devuelve:
+1) Razonamiento breve
+2) Complejidad: Peor Caso (O), Mejor Caso (Ω) y Caso Promedio (Θ).
+[PSEUDOCÓDIGO]
+```plaintext
+{pseudocodigo}
+```
+
+[OUTPUT]
+- En Markdown, conciso.
+- No incluyas texto fuera del análisis.
+"""
+
+def _mensaje_error_analisis(errores):
     mensaje_error = "❌ **No se pudo conectar con ningún modelo de Gemini.**\n\n"
     mensaje_error += "**Intentos realizados:**\n" + "\n".join(f"- {e}" for e in errores)
     mensaje_error += "\n\n💡 **Soluciones:**\n- Verifica tu API Key en https://aistudio.google.com/apikey\n- Revisa cuotas y límites de rate en tu proyecto"
     return mensaje_error
 
+# Cobertura de generar_diagrama_dot: segundos que se espera al modelo en curso antes
+# de lanzar el siguiente, máximo de peticiones simultáneas por diagrama y timeout
+# de cada una. La petición que pierde sigue en curso hasta terminar, así que el
+# pool deja hueco para las sobrantes de varios reruns y las nuevas no esperan en cola.
+RETARDO_COBERTURA_DOT = 5.0
+MAX_DOT_EN_VUELO = 2
+TIMEOUT_DOT = 15
+_POOL_DOT = ThreadPoolExecutor(max_workers=4 * MAX_DOT_EN_VUELO)
+
+@_cachear_respuesta("diagrama")
 def generar_diagrama_dot(api_key, pseudocodigo):
     """
     Solicita a Gemini que genere un código Graphviz (DOT) para visualizar el algoritmo.
@@ -438,7 +793,7 @@ def generar_diagrama_dot(api_key, pseudocodigo):
         return None
 
     tipo_diagrama = "Diagrama de Flujo"
-    if "CALL" in pseudocodigo and "algoritmo" in pseudocodigo: # Detección simple de recursividad
+    if RE_LLAMADA_RECURSIVA.search(pseudocodigo): # Detección simple de recursividad
         tipo_diagrama = "Árbol de Recursión (mostrando las ramas de llamadas)"
 
     prompt_diagrama = f"""
@@ -465,33 +820,55 @@ Haz que el gráfico sea vertical (rankdir=TB). """
 
     configuraciones = [('v1beta', 'gemini-1.5-pro'),('v1beta', 'gemini-2.5-flash'), ('v1', 'gemini-2.5-flash'), ('v1beta', 'gemini-2.0-flash-exp'), ('v1beta', 'gemini-1.5-flash'), ('v1', 'gemini-1.5-pro'), ]
 
-    for api_version, model_name in configuraciones:
-        try:
-            url = f"https://generativelanguage.googleapis.com/{api_version}/models/{model_name}:generateContent?key={api_key}"
-            
-            headers = {'Content-Type': 'application/json'}
-            
-            data = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt_diagrama
-                    }]
-                }]
-            }
-    
-        
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-
-            if response.status_code == 200:
-                result = response.json()
-                texto_respuesta = result['candidates'][0]['content']['parts'][0]['text']
-
-                # Limpiamos el resultado para obtener solo el código DOT
-                # Buscamos contenido entre ```dot ... ``` o simplemente el texto si no tiene tags
-                match = re.search(r'```(?:dot|graphviz)?\n?(.*?)```', texto_respuesta, re.DOTALL)
-                if match:
-                    return match.group(1).strip()
-                return texto_respuesta.strip()
+    data = {
+        "contents": [{
+            "parts": [{
+                "text": prompt_diagrama
+            }]
+        }]
+    }
+
+    # Cobertura escalonada: se consulta el modelo preferido y el siguiente solo se
+    # lanza si este falla o tarda más de RETARDO_COBERTURA_DOT, con a lo sumo
+    # MAX_DOT_EN_VUELO peticiones a la vez. Los modelos en enfriamiento se saltan.
+    candidatas = [c for c in configuraciones if not _en_enfriamiento(*c)]
+    siguiente = 0
+    pendientes = set()
+    while True:
+        if siguiente < len(candidatas) and len(pendientes) < MAX_DOT_EN_VUELO:
+            api_version, model_name = candidatas[siguiente]
+            pendientes.add(_POOL_DOT.submit(_pedir_dot, api_key, api_version, model_name, data))
+            siguiente += 1
+        if not pendientes:
+            return None
+        puede_cubrir = siguiente < len(candidatas) and len(pendientes) < MAX_DOT_EN_VUELO
+        hechos, pendientes = wait(pendientes, timeout=RETARDO_COBERTURA_DOT if puede_cubrir else None,
+                                  return_when=FIRST_COMPLETED)
+        for futuro in hechos:
+            try:
+                codigo_dot = futuro.result()
+            except Exception:
+                continue
+            if codigo_dot:
+                return codigo_dot
 
-        except Exception:
-            continue
\ No newline at end of file
+def _pedir_dot(api_key, api_version, model_name, data):
+    """
+    Una consulta de generar_diagrama_dot; devuelve el código DOT, o None si el
+    modelo falló o respondió algo que no es un grafo DOT (graph o digraph, como
+    acepta la UI). Un 429 lo deja en enfriamiento.
+    """
+    url = f"https://generativelanguage.googleapis.com/{api_version}/models/{model_name}:generateContent?key={api_key}"
+    response = _SESSION.post(url, json=data, timeout=TIMEOUT_DOT)
+    if response.status_code == 429:
+        _marcar_enfriamiento(api_version, model_name, response)
+    if response.status_code != 200:
+        return None
+    result = _json(response)
+    texto_respuesta = result['candidates'][0]['content']['parts'][0]['text']
+
+    # Limpiamos el resultado para obtener solo el código DOT
+    # Buscamos contenido entre ```dot ... ``` o simplemente el texto si no tiene tags
+    match = RE_BLOQUE_DOT.search(texto_respuesta)
+    codigo_dot = match.group(1).strip() if match else texto_respuesta.strip()
+    return codigo_dot if "graph" in codigo_dot else None
@@ -7,12 +7,25 @@
 #
 # Internamente usa la API de Groq (Chat Completions) vía requests.
 
-import streamlit as st
+import functools
+import gzip
+import json
 import requests
+from requests.adapters import HTTPAdapter
 import re
 import os
+import threading
 import time
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.llm_cache import LLMCache
+
+# orjson (opcional) serializa el payload y decodifica las respuestas bastante más
+# rápido que json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Contexto opcional de ejemplos
 try:
@@ -20,9 +33,6 @@ try:
 except Exception:
     all_tests_code = ""
 
-# Cargar variables de entorno
-load_dotenv()
-
 # Gramática del proyecto (se mantiene igual)
 GRAMATICA_PROYECTO = """
 - Las asignaciones usan '🡨'. Ejemplo: x 🡨 10
@@ -37,14 +47,19 @@ GRAMATICA_PROYECTO = """
 
 EJEMPLOS_PSEUDOCODIGO = all_tests_code
 
+# Patrones de compactación de ejemplos (compilados una sola vez)
+RE_LINEAS_VACIAS = re.compile(r'\n\s*\n+')
+RE_COMENTARIO_LARGO = re.compile(r'#[^\n]{100,}')
+
+@functools.lru_cache(maxsize=2)
 def build_system_prompt(incluir_ejemplos_completos=True):
-    """Construye prompt de sistema con gramática y ejemplos (compactado)."""
+    """Construye prompt de sistema con gramática y ejemplos (compactado). Memoizado por flag."""
     if not incluir_ejemplos_completos:
         ejemplos = "Ver ejemplos en contexto de la conversación."
     else:
         ejemplos_raw = EJEMPLOS_PSEUDOCODIGO or ""
-        ejemplos = re.sub(r'\n\s*\n+', '\n', ejemplos_raw)
-        ejemplos = re.sub(r'#[^\n]{100,}', '', ejemplos)
+        ejemplos = RE_LINEAS_VACIAS.sub('\n', ejemplos_raw)
+        ejemplos = RE_COMENTARIO_LARGO.sub('', ejemplos)
         if len(ejemplos) > 20000:
             ejemplos = ejemplos[:20000] + "\n# ... (ejemplos adicionales truncados)"
     return f"""[SYSTEM]
@@ -73,32 +88,225 @@ GROQ_MODEL_TRANSLATE = "llama-3.1-8b-instant"
 GROQ_MODEL_ANALYZE = "llama-3.1-8b-instant"
 GROQ_MODEL_DOT = "llama-3.1-8b-instant"
 
+# streamlit y dotenv se importan de forma perezosa: quien use este módulo desde un
+# script (sin UI) no paga el árbol de imports de Streamlit.
+_ENTORNO_CARGADO = False
+
+def _cargar_entorno():
+    """Carga el .env una sola vez y reaplica los ajustes que dependen del entorno."""
+    global _ENTORNO_CARGADO, GROQ_RPM, _LIMITER, GZIP_PETICION
+    if _ENTORNO_CARGADO:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    _ENTORNO_CARGADO = True
+    GZIP_PETICION = os.getenv("GROQ_GZIP_REQUEST", "0") == "1"
+    rpm = int(os.getenv("GROQ_RPM", "30"))
+    if rpm != GROQ_RPM:
+        GROQ_RPM = rpm
+        _LIMITER = _TokenBucket(ritmo=GROQ_RPM / 60.0, capacidad=GROQ_RPM)
+
+@functools.cache
+def _leer_api_key():
+    """GROQ_API_KEY del entorno (o del .env); se lee una vez por proceso."""
+    _cargar_entorno()
+    return os.getenv("GROQ_API_KEY")
+
+def _reportar_falta_de_key():
+    import streamlit as st
+    st.error("❌ No se encontró GROQ_API_KEY en variables de entorno")
+    st.info("💡 Agrega GROQ_API_KEY al .env o al entorno del sistema")
+
 def configurar_llm():
     """
     Configura y devuelve la API Key de Groq desde variables de entorno.
     También acepta la clave directa si ya la tienes (ej: gsk_...).
+    La lectura se memoiza entre reruns; si el entorno cambia, llamar a
+    _leer_api_key.cache_clear().
     """
     try:
         # Si el usuario te pasó la key directamente, puedes setearla en .env como GROQ_API_KEY
-        api_key = os.getenv("GROQ_API_KEY")
+        api_key = _leer_api_key()
         if not api_key:
-            # Mensaje más claro
-            st.error("❌ No se encontró GROQ_API_KEY en variables de entorno")
-            st.info("💡 Agrega GROQ_API_KEY al .env o al entorno del sistema")
+            # No se memoiza la ausencia: en el siguiente rerun se vuelve a buscar
+            _leer_api_key.cache_clear()
+            _reportar_falta_de_key()
             return None
         return api_key
     except Exception as e:
+        import streamlit as st
         st.error(f"❌ Error al configurar la API: {e}")
         return None
 
-def _groq_chat(api_key: str, system_prompt: str, user_prompt: str, model: str, max_tokens: int = 1024, temperature: float = 0.2, retries: int = 3, timeout: int = 60):
+# Sesión HTTP compartida con keep-alive: las llamadas consecutivas a api.groq.com
+# (p. ej. traducción + corrección) reutilizan la conexión TLS. Con httpx + h2
+# instalados se usa HTTP/2 (peticiones multiplexadas sobre una sola conexión); si no,
+# una requests.Session con pool. Los reintentos ante 429/5xx los gestiona _groq_chat.
+try:
+    import httpx
+    _SESSION = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+        timeout=60.0,
+    )
+    _HTTPX = True
+except ImportError:  # httpx o h2 no instalados
+    _SESSION = requests.Session()
+    _SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+    _HTTPX = False
+_SESSION.headers.update({"Content-Type": "application/json", "Accept-Encoding": "gzip, deflate"})
+
+# Comprimir también el cuerpo de la petición (el SYSTEM_PROMPT viaja en cada
+# llamada). Groq no documenta Content-Encoding en peticiones, así que es opcional:
+# GROQ_GZIP_REQUEST=1 para activarlo.
+GZIP_PETICION = os.getenv("GROQ_GZIP_REQUEST", "0") == "1"
+
+def _dumps(payload):
+    """Payload serializado a bytes UTF-8, con orjson si está instalado."""
+    if orjson:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+def _loads(texto):
+    return orjson.loads(texto) if orjson else json.loads(texto)
+
+def _json(resp):
+    """Cuerpo JSON de la respuesta (de red o de caché), con orjson si está instalado."""
+    if orjson and not isinstance(resp, _RespuestaCacheada):
+        return orjson.loads(resp.content)
+    return resp.json()
+
+def _cuerpo(payload, api_key):
     """
-    Wrapper para llamar a Groq Chat Completions con reintentos simples ante 429/5xx.
+    Cuerpo y cabeceras por petición (gzip nivel 1 si GZIP_PETICION). La key va en
+    cada petición y no en _SESSION: la sesión se comparte entre hilos de _POOL y
+    sesiones de Streamlit con keys distintas.
     """
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+    cuerpo = _dumps(payload)
+    cabeceras = {"Authorization": f"Bearer {api_key}"}
+    if GZIP_PETICION:
+        cabeceras["Content-Encoding"] = "gzip"
+        return gzip.compress(cuerpo, compresslevel=1), cabeceras
+    return cuerpo, cabeceras
+
+def _post(session, payload, timeout, api_key):
+    """POST a Groq con el cuerpo ya serializado (la sesión fija Content-Type)."""
+    cuerpo, cabeceras = _cuerpo(payload, api_key)
+    if _HTTPX:
+        return session.post(GROQ_API_URL, content=cuerpo, headers=cabeceras, timeout=timeout)
+    return session.post(GROQ_API_URL, data=cuerpo, headers=cabeceras, timeout=timeout)
+
+def _post_stream(session, payload, timeout, api_key):
+    """POST en streaming a Groq; el llamador debe cerrar la respuesta."""
+    cuerpo, cabeceras = _cuerpo(payload, api_key)
+    if _HTTPX:
+        peticion = session.build_request("POST", GROQ_API_URL, content=cuerpo, headers=cabeceras, timeout=timeout)
+        return session.send(peticion, stream=True)
+    return session.post(GROQ_API_URL, data=cuerpo, headers=cabeceras, timeout=timeout, stream=True)
+
+def _lineas_stream(resp):
+    return resp.iter_lines() if _HTTPX else resp.iter_lines(decode_unicode=True)
+
+def _texto_stream(resp):
+    if _HTTPX:
+        resp.read()
+    return resp.text
+
+class _TokenBucket:
+    """
+    Limitador de ritmo del lado del cliente: como mucho `capacidad` llamadas seguidas
+    y luego `ritmo` llamadas por segundo. acquire() espera lo justo hasta tener un
+    token, en lugar de chocar con un 429 y pagar el backoff exponencial.
+    """
+    def __init__(self, ritmo: float, capacidad: int):
+        self.ritmo = ritmo
+        self.capacidad = capacidad
+        self._tokens = float(capacidad)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            ahora = time.monotonic()
+            self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.ritmo)
+            self._ultimo = ahora
+            espera = (1.0 - self._tokens) / self.ritmo if self._tokens < 1.0 else 0.0
+            # El token se descuenta ya (puede quedar negativo) para que las
+            # esperas de hilos concurrentes se escalonen
+            self._tokens -= 1.0
+        if espera > 0:
+            time.sleep(espera)
+
+    def agotar(self, segundos: float):
+        """El servidor informa de que no quedan peticiones: la próxima espera `segundos`."""
+        with self._lock:
+            self._tokens = min(self._tokens, 1.0 - segundos * self.ritmo)
+            self._ultimo = time.monotonic()
+
+# Duraciones de las cabeceras x-ratelimit-reset-* de Groq, p. ej. "2m59.56s" o "250ms"
+RE_DURACION = re.compile(r'(?:(\d+)h)?(?:(\d+)m(?!s))?(?:(\d+(?:\.\d+)?)s)?(?:(\d+(?:\.\d+)?)ms)?')
+
+def _duracion(valor):
+    """Segundos de una duración "1m2.5s" / "7.66s" / "250ms" / "3", o None."""
+    if not valor:
+        return None
+    try:
+        return float(valor)
+    except ValueError:
+        pass
+    m = RE_DURACION.fullmatch(valor.strip())
+    if m is None or not any(m.groups()):
+        return None
+    h, mi, seg, ms = (float(g) if g else 0.0 for g in m.groups())
+    return h * 3600 + mi * 60 + seg + ms / 1000
+
+def _espera_reintento(resp, delay):
+    """
+    Espera antes de reintentar: Retry-After o x-ratelimit-reset-requests si el
+    servidor los envía (acotado a 8 s); si no, el backoff exponencial `delay`.
+    En un 429 sin peticiones restantes, agota también _LIMITER hasta el reset.
+    """
+    espera = _duracion(resp.headers.get("retry-after"))
+    reset = _duracion(resp.headers.get("x-ratelimit-reset-requests"))
+    if resp.status_code == 429 and reset is not None \
+            and resp.headers.get("x-ratelimit-remaining-requests") == "0":
+        _LIMITER.agotar(reset)
+    if espera is None:
+        espera = reset if resp.status_code == 429 else None
+    return min(espera, 8.0) if espera is not None else delay
+
+# Peticiones por minuto permitidas por Groq (plan gratuito: 30); configurable por entorno
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+_LIMITER = _TokenBucket(ritmo=GROQ_RPM / 60.0, capacidad=GROQ_RPM)
+
+# Caché exacta de respuestas (ver helpers/llm_cache.py): los reruns de Streamlit
+# con la misma entrada no vuelven a llamar a Groq.
+_CACHE = LLMCache()
+
+class _RespuestaCacheada:
+    """Respuesta servida desde la caché, con la interfaz que usan los llamadores."""
+    status_code = 200
+
+    def __init__(self, datos):
+        self._datos = datos
+
+    def json(self):
+        return self._datos
+
+def _groq_chat(api_key: str, system_prompt: str, user_prompt: str, model: str, max_tokens: int = 1024, temperature: float = 0.2, retries: int = 3, timeout: int = 60, response_format: dict = None):
+    """
+    Wrapper para llamar a Groq Chat Completions. _LIMITER evita los 429 por RPM;
+    los reintentos quedan para 5xx y para 429 residuales (límites de tokens/día).
+    Las respuestas 200 de temperatura baja se sirven desde _CACHE.
+    """
+    clave = _CACHE.cache_key(model, system_prompt, user_prompt, temperature, max_tokens)
+    if clave is not None:
+        datos = _CACHE.get(clave)
+        if datos is not None:
+            return _RespuestaCacheada(datos)
+
+    _LIMITER.acquire()
+    session = _SESSION
     payload = {
         "model": model,
         "messages": [
@@ -108,17 +316,134 @@ def _groq_chat(api_key: str, system_prompt: str, user_prompt: str, model: str, m
         "max_tokens": max_tokens,
         "temperature": temperature,
     }
+    if response_format is not None:
+        payload["response_format"] = response_format
 
     delay = 1.0
     for intento in range(retries):
-        resp = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=timeout)
+        resp = _post(session, payload, timeout, api_key)
         if resp.status_code in (429, 500, 502, 503, 504) and intento < retries - 1:
-            time.sleep(delay)
+            time.sleep(_espera_reintento(resp, delay))
             delay = min(delay * 2, 8.0)
             continue
-        return resp
+        break
+    if clave is not None and resp.status_code == 200:
+        try:
+            _CACHE.set(clave, _json(resp))
+        except ValueError:
+            pass
     return resp
 
+def _groq_chat_stream(api_key: str, system_prompt: str, user_prompt: str, model: str, max_tokens: int = 1024, temperature: float = 0.2, retries: int = 3, timeout: int = 60):
+    """
+    Variante en streaming de _groq_chat ("stream": true, SSE): cede los fragmentos
+    de choices[0].delta.content a medida que llegan. Comparte _CACHE con _groq_chat
+    (un acierto se cede de una vez; una respuesta completa se guarda con el formato
+    no-streaming). Si Groq responde con error, cede el mensaje "❌ ...".
+    """
+    clave = _CACHE.cache_key(model, system_prompt, user_prompt, temperature, max_tokens)
+    if clave is not None:
+        datos = _CACHE.get(clave)
+        if datos is not None:
+            yield datos["choices"][0]["message"]["content"]
+            return
+
+    _LIMITER.acquire()
+    session = _SESSION
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "stream": True,
+    }
+
+    delay = 1.0
+    for intento in range(retries):
+        resp = _post_stream(session, payload, timeout, api_key)
+        if resp.status_code in (429, 500, 502, 503, 504) and intento < retries - 1:
+            resp.close()
+            time.sleep(_espera_reintento(resp, delay))
+            delay = min(delay * 2, 8.0)
+            continue
+        break
+
+    fragmentos = []
+    try:
+        if resp.status_code != 200:
+            texto = _texto_stream(resp)
+            try:
+                msg = _loads(texto).get("error", {}).get("message", texto)
+            except Exception:
+                msg = texto
+            yield f"❌ Error HTTP {resp.status_code}: {msg[:200]}"
+            return
+        for linea in _lineas_stream(resp):
+            if not linea or not linea.startswith("data:"):
+                continue
+            dato = linea[5:].strip()
+            if dato == "[DONE]":
+                break
+            delta = _loads(dato)["choices"][0].get("delta", {}).get("content")
+            if delta:
+                fragmentos.append(delta)
+                yield delta
+    finally:
+        resp.close()
+
+    if clave is not None and fragmentos:
+        _CACHE.set(clave, {"choices": [{"message": {"content": "".join(fragmentos)}}]})
+
+# ------------------------------
+# Prompts de usuario
+# ------------------------------
+# Toda la parte fija va primero y la entrada variable al final: así el prefijo
+# (SYSTEM_PROMPT + instrucciones) es idéntico byte a byte entre llamadas y el
+# caché de prompts del proveedor puede reutilizarlo.
+PROMPT_TRADUCIR = """Convierte a pseudocódigo siguiendo EXACTAMENTE los patrones de los ejemplos.
+
+Devuelve SOLO:
+begin
+    ...
+end
+
+Descripción: """
+
+PROMPT_CORREGIR = """CORRIGE para cumplir gramática exacta de ejemplos.
+Devuelve SOLO begin...end válido.
+
+Código:
+"""
+
+PROMPT_ANALIZAR = """[TAREA]
+Analiza el siguiente algoritmo y devuelve:
+1) Razonamiento breve
+2) Complejidad: Peor Caso (O), Mejor Caso (Ω) y Caso Promedio (Θ).
+
+[OUTPUT]
+- En Markdown, conciso.
+- No incluyas texto fuera del análisis.
+
+[PSEUDOCÓDIGO]
+```plaintext
+"""
+
+PROMPT_DIAGRAMA = """
+**Rol:** Eres un experto en visualización de algoritmos.
+
+**Tarea:** Genera el código fuente en lenguaje DOT (Graphviz) para representar el pseudocódigo indicado al final.
+Requisitos del DOT:
+- rankdir=TB (vertical)
+- Diamantes para condiciones (if/while), Rectángulos para procesos, Óvalos para Inicio/Fin.
+- Si es un árbol de recursión, muestra la jerarquía de llamadas.
+- NO incluyas explicaciones, SOLO el código DOT dentro de un bloque de código.
+- Usa etiquetas claras en las flechas (Sí/No, True/False).
+
+"""
+
 # ------------------------------
 # Traducción a pseudocódigo
 # ------------------------------
@@ -129,14 +454,7 @@ def traducir_a_pseudocodigo(api_key, texto_natural):
     if api_key is None:
         return "❌ **Error:** La API Key no está configurada."
 
-    user_prompt = f"""Convierte a pseudocódigo siguiendo EXACTAMENTE los patrones de los ejemplos.
-
-Descripción: {texto_natural}
-
-Devuelve SOLO:
-begin
-    ...
-end"""
+    user_prompt = PROMPT_TRADUCIR + texto_natural
 
     resp = _groq_chat(
         api_key=api_key,
@@ -148,21 +466,20 @@ end"""
     )
 
     if resp.status_code == 200:
-        data = resp.json()
+        data = _json(resp)
         try:
             text = data["choices"][0]["message"]["content"]
         except Exception:
             return "❌ Error: Respuesta inválida de Groq."
         limpio = limpiar_respuesta_llm(text)
 
-        # Validación begin/end mínima; si falta, segunda pasada para corregir
-        if not re.search(r'^\s*begin\s*$', limpio, re.MULTILINE) or not re.search(r'^\s*end\s*$', limpio, re.MULTILINE):
-            prompt_fix = f"""CORRIGE para cumplir gramática exacta de ejemplos.
-
-Código:
-{limpio}
-
-Devuelve SOLO begin...end válido."""
+        # Validación begin/end mínima. Si falta pero el cuerpo ya trae líneas de la
+        # gramática, basta con envolverlo aquí; solo una salida casi vacía justifica
+        # una segunda llamada a Groq para corregir
+        if not _has_begin_end(limpio) and _lineas_reconocidas(limpio) >= 2:
+            limpio = f"begin\n{limpio}\nend"
+        elif not _has_begin_end(limpio):
+            prompt_fix = PROMPT_CORREGIR + limpio
             resp_fix = _groq_chat(
                 api_key=api_key,
                 system_prompt=SYSTEM_PROMPT,
@@ -172,50 +489,146 @@ Devuelve SOLO begin...end válido."""
                 temperature=0.0
             )
             if resp_fix.status_code == 200:
-                data_fix = resp_fix.json()
+                data_fix = _json(resp_fix)
                 try:
                     fixed = data_fix["choices"][0]["message"]["content"]
                     if fixed:
                         return limpiar_respuesta_llm(fixed)
                 except Exception:
                     pass
+        import streamlit as st
         st.success(f"✅ Traducción realizada con Groq ({GROQ_MODEL_TRANSLATE})")
         return limpio
 
     else:
         try:
-            err = resp.json()
+            err = _json(resp)
             msg = err.get("error", {}).get("message", str(err))
         except Exception:
             msg = resp.text
         return f"❌ Error HTTP {resp.status_code}: {msg[:200]}"
 
-def limpiar_respuesta_llm(texto: str):
+# Patrones de limpieza de respuestas (compilados una sola vez)
+RE_BLOQUE_CODIGO = re.compile(r'```(?:plaintext|text)?\n?(.*?)\n?```', re.DOTALL)
+RE_BLOQUE_DOT = re.compile(r'```(?:dot|graphviz)?\n?(.*?)```', re.DOTALL)
+# Palabra clave al inicio (sin distinguir mayúsculas), asignación, length(...) o
+# acceso a arreglo, en una sola alternación
+RE_LINEA_GRAMATICA = re.compile(
+    r'^(?i:for|while|repeat|until|if|else|return|CALL)\b'
+    r'|🡨'
+    r'|\blength\(\w+\)\b'
+    r'|\w+\s*\[\s*\w+\s*\]'
+)
+
+def _linea_valida(s: str) -> bool:
+    """True si la línea (ya sin espacios en los extremos) respeta la gramática."""
+    return s in ("begin", "end") or s.startswith("►") or RE_LINEA_GRAMATICA.search(s) is not None
+
+def _has_begin_end(texto: str) -> bool:
+    """True si hay una línea 'begin' y una línea 'end' (ignorando espacios). Una sola pasada."""
+    lineas = {linea.strip() for linea in texto.splitlines()}
+    return "begin" in lineas and "end" in lineas
+
+def _lineas_reconocidas(texto: str) -> int:
+    """Número de líneas de cuerpo (distintas de begin/end) que respetan la gramática."""
+    return sum(1 for linea in texto.splitlines()
+               if linea.strip() not in ("begin", "end") and _linea_valida(linea.strip()))
+
+def limpiar_respuesta_llm(texto: str) -> str:
     """
     Limpia el bloque de código de la respuesta.
     Quita ```plaintext ... ``` o ``` ... ```
     Filtra líneas que cumplen la gramática y garantiza begin/end.
     """
-    match = re.search(r'```(?:plaintext|text)?\n?(.*?)\n?```', texto, re.DOTALL)
+    match = RE_BLOQUE_CODIGO.search(texto)
     if match:
         texto = match.group(1).strip()
 
-    lineas = []
-    for linea in texto.splitlines():
-        s = linea.strip()
-        if s in ("begin", "end") or \
-           re.match(r'^(for|while|repeat|until|if|else|return|CALL)\b', s, re.IGNORECASE) or \
-           re.search(r'🡨', s) or \
-           re.search(r'\blength\(\w+\)\b', s) or \
-           re.search(r'\w+\s*\[\s*\w+\s*\]', s) or \
-           s.startswith("►"):
-            lineas.append(linea)
+    lineas = [linea for linea in texto.splitlines() if _linea_valida(linea.strip())]
 
     joined = "\n".join(lineas).strip()
     if "begin" not in joined or "end" not in joined:
         joined = "begin\n" + "\n".join(lineas) + "\nend"
     return joined.strip()
 
+def _iter_clean_lines(fragmentos):
+    """
+    Versión incremental de limpiar_respuesta_llm: recibe los fragmentos del stream
+    y cede (con su salto de línea) solo las líneas que respetan la gramática, a
+    medida que se completan. Las cercas ``` se descartan y lo que sigue a la de
+    cierre se ignora. Si la salida no abre con 'begin' se antepone uno; al final se
+    cierran con 'end' los bloques que hayan quedado abiertos, para que begin/end
+    queden balanceados. Un error "❌ ..." se cede tal cual.
+    """
+    pendiente = ""
+    cercas = 0
+    abierto = False
+    profundidad = 0  # bloques begin aún sin su end
+    for fragmento in fragmentos:
+        if not abierto and not pendiente and fragmento.startswith("❌"):
+            yield fragmento
+            yield from fragmentos
+            return
+        pendiente += fragmento
+        *lineas, pendiente = pendiente.split("\n")
+        for linea in lineas:
+            s = linea.strip()
+            if s.startswith("```"):
+                cercas += 1
+                if cercas == 2:
+                    break
+                continue
+            if not _linea_valida(s):
+                continue
+            if not abierto:
+                abierto = True
+                if s != "begin":
+                    profundidad = 1
+                    yield "begin\n"
+            if s == "begin":
+                profundidad += 1
+            elif s == "end":
+                profundidad -= 1
+            yield linea + "\n"
+        if cercas == 2:
+            pendiente = ""
+            break
+    s = pendiente.strip()
+    if s and not s.startswith("```") and _linea_valida(s):
+        if not abierto:
+            abierto = True
+            if s != "begin":
+                profundidad = 1
+                yield "begin\n"
+        if s == "begin":
+            profundidad += 1
+        elif s == "end":
+            profundidad -= 1
+        yield pendiente + "\n"
+    if not abierto:
+        yield "begin\n"
+        profundidad = 1
+    for _ in range(profundidad):
+        yield "end\n"
+
+def traducir_a_pseudocodigo_stream(api_key, texto_natural):
+    """
+    Variante en streaming de traducir_a_pseudocodigo: cede las líneas ya limpias
+    del pseudocódigo a medida que Groq las genera.
+    """
+    if api_key is None:
+        yield "❌ **Error:** La API Key no está configurada."
+        return
+
+    yield from _iter_clean_lines(_groq_chat_stream(
+        api_key=api_key,
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt=PROMPT_TRADUCIR + texto_natural,
+        model=GROQ_MODEL_TRANSLATE,
+        max_tokens=512,
+        temperature=0.0
+    ))
+
 # ------------------------------
 # Segunda opinión (análisis LLM)
 # ------------------------------
@@ -226,20 +639,7 @@ def obtener_analisis_llm(api_key, pseudocodigo):
     if api_key is None:
         return "❌ **Error:** La API Key no está configurada."
 
-    user_prompt = f"""[TAREA]
-Analiza el siguiente algoritmo y devuelve:
-1) Razonamiento breve
-2) Complejidad: Peor Caso (O), Mejor Caso (Ω) y Caso Promedio (Θ).
-
-[PSEUDOCÓDIGO]
-```plaintext
-{pseudocodigo}
-```
-
-[OUTPUT]
-- En Markdown, conciso.
-- No incluyas texto fuera del análisis.
-"""
+    user_prompt = f"{PROMPT_ANALIZAR}{pseudocodigo}\n```\n"
 
     resp = _groq_chat(
         api_key=api_key,
@@ -252,51 +652,209 @@ Analiza el siguiente algoritmo y devuelve:
 
     if resp.status_code == 200:
         try:
-            data = resp.json()
+            data = _json(resp)
             text = data["choices"][0]["message"]["content"]
+            import streamlit as st
             st.success(f"✅ Usando Groq: {GROQ_MODEL_ANALYZE}")
             return text.strip()
         except Exception:
             return "❌ Error: Estructura de respuesta inválida de Groq."
     else:
         try:
-            err = resp.json()
+            err = _json(resp)
             msg = err.get("error", {}).get("message", str(err))
         except Exception:
             msg = resp.text
         return f"❌ Error HTTP {resp.status_code}: {msg[:200]}"
 
+def obtener_analisis_llm_stream(api_key, pseudocodigo):
+    """
+    Variante en streaming de obtener_analisis_llm, para usar con st.write_stream:
+    el análisis se muestra a medida que Groq lo genera.
+    """
+    if api_key is None:
+        yield "❌ **Error:** La API Key no está configurada."
+        return
+
+    yield from _groq_chat_stream(
+        api_key=api_key,
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt=f"{PROMPT_ANALIZAR}{pseudocodigo}\n```\n",
+        model=GROQ_MODEL_ANALYZE,
+        max_tokens=768,
+        temperature=0.1
+    )
+
 # ------------------------------
 # Diagrama DOT (Graphviz)
 # ------------------------------
+# Llamada recursiva: CALL seguido del nombre del propio algoritmo
+RE_LLAMADA_RECURSIVA = re.compile(r'\bCALL\s+algoritmo\b')
+RE_CABECERA_BLOQUE = re.compile(r'^(?:(if)\b(.*?)\bthen|(for|while)\b(.*?)\bdo)\s*$', re.IGNORECASE)
+
+# Fracción mínima de líneas reconocidas para confiar en el emisor local
+COBERTURA_MIN_DOT = 0.6
+
+def _parsear_bloque(lineas, i):
+    """
+    Un bloque es 'begin ... end' o, sin begin, las sentencias hasta 'end' (que se
+    consume) o hasta 'else'/'until' (que no). Devuelve (sentencias, i siguiente).
+    Cada sentencia es una tupla ("simple", texto) | ("if", cond, entonces, sino) |
+    ("bucle", cabecera, cuerpo) | ("repeat", cuerpo, cond).
+    """
+    con_begin = lineas[i].lower() == "begin"
+    if con_begin:
+        i += 1
+    sentencias = []
+    while True:
+        baja = lineas[i].lower()
+        if baja == "end":
+            return sentencias, i + 1
+        if not con_begin and (baja.startswith("else") or baja.startswith("until")):
+            return sentencias, i
+        sentencia, i = _parsear_sentencia(lineas, i)
+        sentencias.append(sentencia)
+
+def _parsear_sentencia(lineas, i):
+    linea = lineas[i]
+    baja = linea.lower()
+    cabecera = RE_CABECERA_BLOQUE.match(linea)
+    if cabecera and cabecera.group(1):
+        entonces, i = _parsear_bloque(lineas, i + 1)
+        sino = []
+        if i < len(lineas) and lineas[i].lower().startswith("else"):
+            resto = lineas[i][4:].strip()
+            if resto:
+                lineas[i] = resto  # 'else if ...': la sentencia sigue en la misma línea
+                sino, i = _parsear_bloque(lineas, i)
+            else:
+                sino, i = _parsear_bloque(lineas, i + 1)
+        return ("if", cabecera.group(2).strip(), entonces, sino), i
+    if cabecera:
+        cuerpo, i = _parsear_bloque(lineas, i + 1)
+        return ("bucle", linea, cuerpo), i
+    if baja == "repeat":
+        i += 1
+        cuerpo = []
+        while not lineas[i].lower().startswith("until"):
+            sentencia, i = _parsear_sentencia(lineas, i)
+            cuerpo.append(sentencia)
+        return ("repeat", cuerpo, lineas[i][5:].strip()), i + 1
+    if baja in ("begin", "end", "else"):
+        raise ValueError(f"'{linea}' fuera de lugar")
+    return ("simple", linea), i + 1
+
+def _emit_dot_from_pseudocode(ps: str):
+    """
+    Emite localmente un diagrama de flujo DOT para pseudocódigo de la gramática
+    (óvalos Inicio/Fin, diamantes para if/for/while/until, rectángulos para el resto).
+    Devuelve None si la estructura no se reconoce o la cobertura es baja, para
+    que el llamador recurra al LLM.
+    """
+    lineas = [linea.split("►")[0].strip() for linea in ps.splitlines()]
+    lineas = [linea for linea in lineas if linea]
+    if not lineas:
+        return None
+    estructurales = ("begin", "end", "else", "repeat")
+    reconocidas = sum(1 for linea in lineas
+                      if linea.lower() in estructurales or _linea_valida(linea))
+    if reconocidas / len(lineas) < COBERTURA_MIN_DOT:
+        return None
+
+    # Cabecera opcional (p. ej. 'busqueda(A, n)' o declaraciones) antes del begin
+    try:
+        inicio = [linea.lower() for linea in lineas].index("begin")
+    except ValueError:
+        return None
+    cabecera = ", ".join(lineas[:inicio])
+    lineas = lineas[inicio:]
+    try:
+        sentencias, i = _parsear_bloque(lineas, 0)
+    except (IndexError, ValueError):
+        return None
+    if i != len(lineas):
+        return None
+
+    nodos, aristas = [], []
+
+    def nodo(etiqueta, forma):
+        nombre = f"n{len(nodos)}"
+        etiqueta = etiqueta.replace("\\", "\\\\").replace('"', '\\"')
+        nodos.append(f'    {nombre} [label="{etiqueta}", shape={forma}];')
+        return nombre
+
+    def unir(pendientes, destino):
+        for origen, etiqueta in pendientes:
+            extra = f' [label="{etiqueta}"]' if etiqueta else ""
+            aristas.append(f"    {origen} -> {destino}{extra};")
+
+    def emitir(sentencias, pendientes):
+        # pendientes: aristas (origen, etiqueta) que aún no tienen destino
+        for sentencia in sentencias:
+            tipo = sentencia[0]
+            if tipo == "simple":
+                actual = nodo(sentencia[1], "box")
+                unir(pendientes, actual)
+                if sentencia[1].lower().startswith("return"):
+                    unir([(actual, "")], "fin")
+                    pendientes = []
+                else:
+                    pendientes = [(actual, "")]
+            elif tipo == "if":
+                actual = nodo(sentencia[1], "diamond")
+                unir(pendientes, actual)
+                pendientes = emitir(sentencia[2], [(actual, "Sí")]) + emitir(sentencia[3], [(actual, "No")])
+            elif tipo == "bucle":
+                actual = nodo(sentencia[1], "diamond")
+                unir(pendientes, actual)
+                unir(emitir(sentencia[2], [(actual, "Sí")]), actual)
+                pendientes = [(actual, "No")]
+            else:  # repeat
+                primero = f"n{len(nodos)}"
+                salida = emitir(sentencia[1], pendientes)
+                actual = nodo(f"until {sentencia[2]}", "diamond")
+                unir(salida, actual)
+                # Sin cuerpo, el primer nodo creado es el propio diamante
+                unir([(actual, "No")], primero)
+                pendientes = [(actual, "Sí")]
+        return pendientes
+
+    unir(emitir(sentencias, [("inicio", "")]), "fin")
+    etiqueta_inicio = f"Inicio: {cabecera}" if cabecera else "Inicio"
+    etiqueta_inicio = etiqueta_inicio.replace("\\", "\\\\").replace('"', '\\"')
+    return "\n".join([
+        "digraph G {",
+        "    rankdir=TB;",
+        f'    inicio [label="{etiqueta_inicio}", shape=oval];',
+        '    fin [label="Fin", shape=oval];',
+        *nodos,
+        *aristas,
+        "}",
+    ])
+
 def generar_diagrama_dot(api_key, pseudocodigo):
     """
-    Solicita al LLM Groq un código DOT para visualizar el algoritmo.
-    Si detecta recursividad simple, sugiere árbol de llamadas; si no, flujo.
+    Código DOT para visualizar el algoritmo. Los diagramas de flujo se emiten
+    localmente cuando la gramática se reconoce; el resto (árboles de recursión o
+    pseudocódigo irregular) se piden al LLM Groq.
     """
     if api_key is None:
         return None
 
     tipo_diagrama = "Diagrama de Flujo"
-    if "CALL" in pseudocodigo and "algoritmo" in pseudocodigo:
+    if RE_LLAMADA_RECURSIVA.search(pseudocodigo):
         tipo_diagrama = "Árbol de Recursión (mostrando las ramas de llamadas)"
+    else:
+        dot = _emit_dot_from_pseudocode(pseudocodigo)
+        if dot is not None:
+            return dot
 
-    prompt_diagrama = f"""
-**Rol:** Eres un experto en visualización de algoritmos.
-
-**Tarea:** Genera el código fuente en lenguaje DOT (Graphviz) para representar el siguiente pseudocódigo.
-El tipo de representación debe ser: **{tipo_diagrama}**.
+    prompt_diagrama = f"""{PROMPT_DIAGRAMA}El tipo de representación debe ser: **{tipo_diagrama}**.
 
 **Pseudocódigo:**
 ```plaintext
 {pseudocodigo}
 ```
-Requisitos del DOT:
-- rankdir=TB (vertical)
-- Diamantes para condiciones (if/while), Rectángulos para procesos, Óvalos para Inicio/Fin.
-- Si es un árbol de recursión, muestra la jerarquía de llamadas.
-- NO incluyas explicaciones, SOLO el código DOT dentro de un bloque de código.
-- Usa etiquetas claras en las flechas (Sí/No, True/False).
 """
 
     resp = _groq_chat(
@@ -310,14 +868,99 @@ Requisitos del DOT:
 
     if resp.status_code == 200:
         try:
-            data = resp.json()
+            data = _json(resp)
             text = data["choices"][0]["message"]["content"]
             # Intentar extraer solo el bloque DOT
-            match = re.search(r'```(?:dot|graphviz)?\n?(.*?)```', text, re.DOTALL)
+            match = RE_BLOQUE_DOT.search(text)
             if match:
                 return match.group(1).strip()
             return text.strip()
         except Exception:
             return None
     else:
-        return None
\ No newline at end of file
+        return None
+
+# Pool para lanzar llamadas independientes en segundo plano (el cliente HTTP es
+# compartido y seguro entre hilos).
+_POOL = ThreadPoolExecutor(max_workers=4)
+
+def iniciar_diagrama_dot(api_key, pseudocodigo):
+    """
+    Lanza generar_diagrama_dot en segundo plano y devuelve un Future con el DOT.
+    Así el diagrama se genera en paralelo con el análisis (estático y del LLM)
+    en lugar de esperar a que este termine.
+    """
+    return _POOL.submit(generar_diagrama_dot, api_key, pseudocodigo)
+
+PROMPT_ANALISIS_Y_DOT = """[TAREA]
+Devuelve un objeto JSON con exactamente dos claves:
+- "analisis": análisis en Markdown, conciso: razonamiento breve y complejidad en
+  Peor Caso (O), Mejor Caso (Ω) y Caso Promedio (Θ).
+- "dot": código DOT (Graphviz) del algoritmo, rankdir=TB, diamantes para
+  condiciones (if/while), rectángulos para procesos, óvalos para Inicio/Fin y
+  etiquetas Sí/No en las flechas. Si hay recursión, árbol de llamadas.
+No incluyas texto fuera del JSON.
+[PSEUDOCÓDIGO]
+```plaintext
+"""
+
+def obtener_analisis_y_dot(api_key, pseudocodigo):
+    """
+    Pide análisis y diagrama DOT en una sola completion (salida JSON), de modo
+    que el pseudocódigo se procesa una única vez. Devuelve (analisis, dot);
+    dot es None si no se pudo obtener.
+    """
+    if api_key is None:
+        return "❌ **Error:** La API Key no está configurada.", None
+
+    # Si el diagrama de flujo sale localmente, solo hace falta pedir el análisis
+    dot_local = None
+    if not RE_LLAMADA_RECURSIVA.search(pseudocodigo):
+        dot_local = _emit_dot_from_pseudocode(pseudocodigo)
+
+    if dot_local is not None:
+        resp = _groq_chat(
+            api_key=api_key,
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=f"{PROMPT_ANALIZAR}{pseudocodigo}\n```\n",
+            model=GROQ_MODEL_ANALYZE,
+            max_tokens=768,
+            temperature=0.1
+        )
+    else:
+        resp = _groq_chat(
+            api_key=api_key,
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=f"{PROMPT_ANALISIS_Y_DOT}{pseudocodigo}\n```\n",
+            model=GROQ_MODEL_ANALYZE,
+            max_tokens=1280,
+            temperature=0.1,
+            response_format={"type": "json_object"}
+        )
+
+    if resp.status_code != 200:
+        try:
+            err = _json(resp)
+            msg = err.get("error", {}).get("message", str(err))
+        except Exception:
+            msg = resp.text
+        return f"❌ Error HTTP {resp.status_code}: {msg[:200]}", None
+
+    try:
+        text = _json(resp)["choices"][0]["message"]["content"]
+        if dot_local is not None:
+            return text.strip(), dot_local
+        datos = json.loads(text)
+        analisis = str(datos.get("analisis", "")).strip()
+        dot = datos.get("dot") or None
+    except Exception:
+        return "❌ Error: Estructura de respuesta inválida de Groq.", None
+
+    if dot:
+        match = RE_BLOQUE_DOT.search(dot)
+        dot = (match.group(1) if match else dot).strip()
+    return analisis, dot
+
+def iniciar_analisis_y_dot(api_key, pseudocodigo):
+    """Lanza obtener_analisis_y_dot en segundo plano y devuelve un Future con (analisis, dot)."""
+    return _POOL.submit(obtener_analisis_y_dot, api_key, pseudocodigo)
@@ -1,5 +1,7 @@
 import re
 import math
+import functools
+from concurrent.futures import ProcessPoolExecutor
 
 # -----------------------------------------------------------------------------
 # ANALIZADOR DE COMPLEJIDAD
@@ -30,73 +32,266 @@ import math
 
 class Complejidad:
     """Tipo para representar O(n^a log^b n) y operar asintóticamente."""
+    __slots__ = ('grado', 'log_factor', '_dom')
+
     def __init__(self, grado=0.0, log_factor=0):
         self.grado = float(grado)
         self.log_factor = int(log_factor)
+        self._dom = (self.grado, self.log_factor)  # orden asintótico, precalculado
 
     def __repr__(self):
-        if math.isclose(self.grado, 0.0) and self.log_factor == 0: return "1"
-        if math.isclose(self.grado, 0.0): return "log(n)" if self.log_factor == 1 else f"log^{self.log_factor}(n)"
-        term_n = "n" if math.isclose(self.grado, 1.0) else f"n^{self.grado:g}"
+        # grado sale de literales, de float() sobre dígitos o de log_b(a): la
+        # comparación exacta basta (log_b(b) y log_b(1) dan 1.0 y 0.0 exactos)
+        if self.grado == 0.0 and self.log_factor == 0: return "1"
+        if self.grado == 0.0: return "log(n)" if self.log_factor == 1 else f"log^{self.log_factor}(n)"
+        term_n = "n" if self.grado == 1.0 else f"n^{self.grado:g}"
         term_log = "" if self.log_factor == 0 else ("log(n)" if self.log_factor == 1 else f"log^{self.log_factor}(n)")
         return f"{term_n}{' ' if term_log else ''}{term_log}".strip()
 
     def dominio(self):
-        return (self.grado, self.log_factor)
+        return self._dom
+
+    # Las instancias no se modifican tras crearse: se comparan por valor y se comparten
+    def __eq__(self, other):
+        return isinstance(other, Complejidad) and self._dom == other._dom
+
+    def __hash__(self):
+        return hash(self._dom)
 
     def __add__(self, other):
-        return self if self.dominio() >= other.dominio() else other
+        if other is _CONSTANTE: return self  # grado y log_factor nunca son negativos
+        return self if self._dom >= other._dom else other
 
     def __mul__(self, other):
-        return Complejidad(self.grado + other.grado, self.log_factor + other.log_factor)
+        return Complejidad._make(self.grado + other.grado, self.log_factor + other.log_factor)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _make(grado, log_factor):
+        """Instancia compartida para (grado, log_factor): evita repetir objetos iguales."""
+        return Complejidad(grado, log_factor)
 
     @staticmethod
-    def constante(): return Complejidad(0.0, 0)
+    def constante(): return _CONSTANTE
     @staticmethod
-    def lineal(): return Complejidad(1.0, 0)
+    def lineal(): return _LINEAL
     @staticmethod
-    def log(): return Complejidad(0.0, 1)
+    def log(): return _LOG
+
+
+_CONSTANTE = Complejidad(0.0, 0)
+_LINEAL = Complejidad(1.0, 0)
+_LOG = Complejidad(0.0, 1)
+_CUADRATICA = Complejidad(2.0, 0)
+
+# Límites de for más habituales, resueltos sin regex
+TAMANOS_FRECUENTES = {'n': _LINEAL, 'm': _LINEAL, 'n*m': _CUADRATICA}
 
 
 # -----------------------------------------------------------------------------
 # SUBRUTINAS CONOCIDAS
 # -----------------------------------------------------------------------------
 SUBRUTINAS_COMPLEJIDAD = {
-    'combinar': Complejidad(grado=1),
-    'busqueda_lineal': Complejidad(grado=1),
-    'swap': Complejidad(grado=0),
-    'imprimir': Complejidad(grado=0),
+    'combinar': _LINEAL,
+    'busqueda_lineal': _LINEAL,
+    'swap': _CONSTANTE,
+    'imprimir': _CONSTANTE,
 }
 
 
+# -----------------------------------------------------------------------------
+# PATRONES (compilados una sola vez al importar el módulo)
+# -----------------------------------------------------------------------------
+# Los patrones que se aplican línea a línea en analizar_iterativo están en
+# minúsculas y sin re.IGNORECASE: se buscan sobre la línea ya pasada a minúsculas
+# (ver tokenizar), en lugar de plegar mayúsculas carácter a carácter en cada búsqueda.
+RE_DECLARACION = re.compile(r'^\s*([A-Z]\w*\s+)?\w+(\[\w*(\]\[\w*)*\])?\s*$')  # sobre la línea original
+RE_CALL = re.compile(r'call\s+(\w+)\s*\((.*?)\)')
+RE_FOR = re.compile(r'for\s+(\w+)\s*🡨\s*([-\w]+)\s+to\s+([^\s]+)\s+do')
+RE_WHILE = re.compile(r'while\s+\((.+)\)\s+do')
+RE_REPEAT = re.compile(r'^\s*repeat\s*$')
+RE_IF = re.compile(r'^\s*if\s+\(.+\)\s+then\s*$')
+RE_ELSE = re.compile(r'^\s*else\s*$')
+RE_END = re.compile(r'^\s*end\s*$')
+RE_UNTIL = re.compile(r'^\s*until\s*\(.+\)\s*$')
+RE_HINT = re.compile(r'►\s*o\((.+?)\)')
+RE_PALABRA_CONTROL = re.compile(r'(for|while|repeat|if|call)')
+RE_VAR_CONDICION = re.compile(r'(\w+)\s*[<>=!≤≥]')
+RE_VAR_ASIGNADA = re.compile(r'^(\w+)\s*🡨')
+RE_CALL_NOMBRE = re.compile(r'CALL\s+(\w+)')
+# Actualización de la variable de un while/repeat sobre sí misma: x 🡨 x <op> k
+RE_ACTUALIZACION = re.compile(r'^(\w+)\s*🡨\s*\1\s*([-+*/])\s*\d+')
+# Patrón de iteraciones según el operador de la actualización
+TIPO_ACTUALIZACION = {'+': 'linear', '-': 'linear', '*': 'log', '/': 'log'}
+
+# Expresiones de tamaño y de complejidad (límites de for, pistas ► O(...), f(n))
+RE_POTENCIA_N = re.compile(r'n\^(\d+(\.\d+)?)')
+RE_N = re.compile(r'\bn\b')
+RE_O_GRANDE = re.compile(r'O\((.*)\)')
+
+# Estructuras de control en una sola búsqueda por línea: alternancia con grupos
+# nombrados, el tipo de línea se lee de m.lastgroup. La búsqueda devuelve la
+# coincidencia más a la izquierda; como en el análisis original 'for' tiene
+# prioridad sobre todo lo demás y 'while' sobre el resto aunque aparezcan más a la
+# derecha en la línea, eso se comprueba aparte en _tokenizar_lineas.
+RE_CONTROL = re.compile('|'.join(
+    f'(?P<{tipo}>{patron.pattern})' for tipo, patron in (
+        ('FOR', RE_FOR), ('WHILE', RE_WHILE), ('REPEAT', RE_REPEAT), ('IF', RE_IF),
+        ('ELSE', RE_ELSE), ('END', RE_END), ('UNTIL', RE_UNTIL),
+    )
+))
+# Posición de los grupos internos de FOR (var, inicio, fin) y WHILE (condición)
+# dentro de RE_CONTROL, para no repetir la búsqueda con RE_FOR / RE_WHILE
+_GRUPOS_CONTROL = {
+    'FOR': range(RE_CONTROL.groupindex['FOR'] + 1, RE_CONTROL.groupindex['FOR'] + 4),
+    'WHILE': range(RE_CONTROL.groupindex['WHILE'] + 1, RE_CONTROL.groupindex['WHILE'] + 2),
+}
+# Los mismos grupos dentro de RE_FOR / RE_WHILE, cuando la prioridad obliga a buscarlos
+_GRUPOS_PROPIOS = {'FOR': range(1, 4), 'WHILE': range(1, 2)}
+
+# DP patterns
+# Acceso a tabla 1D o 2D en un solo patrón: el grupo 1 (segundo índice) indica 2D
+RE_DP_ACCESS = re.compile(r'\b\w+\s*\[\s*\w+\s*\](\s*\[\s*\w+\s*\])?')
+RE_MEMO_READ = re.compile(r'if\s*\(\s*\w+\s*\[\s*[^]]+\s*\]\s*(!=|==)\s*\w+\s*\)\s*then')
+RE_MEMO_WRITE = re.compile(r'\b\w+\s*\[\s*[^]]+\s*\]\s*🡨')
+RE_MIN_MAX_TRANSITION = re.compile(r'\b(min|max)\s*\(')
+
+# Branch & Bound (heurístico)
+RE_BNB_COND = re.compile(r'\b(bound|cota|upper|lower|mejor|best)\b', re.IGNORECASE)
+RE_BNB_PRUNE = re.compile(r'if\s*\(.+?\)\s*then\s*(return|continue|skip)', re.IGNORECASE)
+
+# Limpieza del cuerpo principal
+RE_CLASE = re.compile(r'^\s*\w+\s*\{.*')
+RE_SUBRUTINA = re.compile(r'^\s*\w+\(.*\)')
+RE_CABECERA_ALGORITMO = re.compile(r'^\s*algoritmo\(.*\)')
+
+
+def _minusculas(linea):
+    """
+    linea.lower() con la misma longitud que linea, para que las posiciones de una
+    búsqueda en minúsculas valgan en el original. Solo 'İ' se alarga con lower();
+    en ese caso se toma su minúscula simple, como hace re.IGNORECASE.
+    """
+    baja = linea.lower()
+    if len(baja) != len(linea):
+        baja = ''.join(c.lower()[0] for c in linea)
+    return baja
+
+
+@functools.lru_cache(maxsize=128)
+def _complejidad_pista(hint):
+    """
+    Complejidad de una pista '► O(hint)' (hint ya en minúsculas): n^k, log n, n o 1.
+    Memoizada por texto: un mismo archivo suele repetir las mismas pistas.
+    """
+    if 'n^' in hint:
+        mk = RE_POTENCIA_N.search(hint)
+        return Complejidad(float(mk.group(1)), 0) if mk else Complejidad.lineal()
+    if 'log' in hint and 'n' in hint:
+        return Complejidad.log()
+    if RE_N.search(hint):
+        return Complejidad.lineal()
+    return Complejidad.constante()
+
+
+# Los límites de for y los f(n) se repiten mucho entre análisis ('n', 'length(A)',
+# 'n/2', 'n log(n)'...): se memoizan por texto
+@functools.lru_cache(maxsize=256)
+def parse_size_expr(expr: str) -> Complejidad:
+    """Número de iteraciones de un for según la expresión de su límite superior."""
+    e = expr.strip().lower()
+    comp = TAMANOS_FRECUENTES.get(e)
+    if comp is not None: return comp
+    if e.isdecimal(): return Complejidad.constante()  # mismo conjunto que \d+
+    if e.startswith('n^'):
+        m_pow = RE_POTENCIA_N.fullmatch(e)
+        if m_pow: return Complejidad(grado=float(m_pow.group(1)))
+    # length(A), n/k, m/k y cualquier otra expresión: lineal
+    return Complejidad.lineal()
+
+
+@functools.lru_cache(maxsize=256)
+def parse_comp_str(s: str) -> Complejidad:
+    """Complejidad a partir de su representación textual (lo que va dentro de O(...))."""
+    s = s.lower()
+    if 'n^' in s:
+        mk = RE_POTENCIA_N.search(s)
+        return Complejidad(float(mk.group(1)), 1 if 'log' in s else 0) if mk else Complejidad.lineal()
+    if 'log' in s and 'n' in s:
+        return Complejidad.log()
+    if RE_N.search(s):
+        return Complejidad.lineal()
+    return Complejidad.constante()
+
+
+def _tokenizar_lineas(lineas):
+    """
+    Preprocesa las líneas una sola vez: devuelve una tupla con una quíntupla
+    (linea, baja, tipo_linea, grupos, sigue_else) por línea no vacía, con la línea ya
+    sin espacios en los extremos, la misma línea en minúsculas, el tipo de estructura
+    de control según RE_CONTROL ('FOR', 'END', ...) o None, los grupos capturados (con
+    el texto original) para FOR (var, inicio, fin) y WHILE (condición), y si la línea
+    siguiente es 'else' o empieza por 'until' (un 'end' así no cierra el scope).
+    """
+    tokens = []
+    for linea in map(str.strip, lineas):
+        if not linea: continue
+        baja = _minusculas(linea)
+        m_control = RE_CONTROL.search(baja)
+        if m_control is None:
+            tokens.append([linea, baja, None, None, False])
+            continue
+        tipo = m_control.lastgroup
+        grupos = _GRUPOS_CONTROL.get(tipo)
+        # Prioridad for > while > resto aunque la coincidencia quede más a la derecha
+        if tipo != 'FOR':
+            m_prioritaria = RE_FOR.search(baja) if 'for' in baja else None
+            if m_prioritaria is not None:
+                tipo = 'FOR'
+            elif tipo != 'WHILE' and 'while' in baja:
+                m_prioritaria = RE_WHILE.search(baja)
+                if m_prioritaria is not None:
+                    tipo = 'WHILE'
+            if m_prioritaria is not None:
+                m_control = m_prioritaria
+                grupos = _GRUPOS_PROPIOS[tipo]
+        if grupos:
+            grupos = tuple(linea[m_control.start(g):m_control.end(g)] for g in grupos)
+            if len(grupos) == 1:
+                grupos = grupos[0]
+        tokens.append([linea, baja, tipo, grupos, False])
+    for anterior, token in zip(tokens, tokens[1:]):
+        anterior[4] = token[0] == 'else' or token[0].startswith('until')
+    return tuple(map(tuple, tokens))
+
+
+@functools.lru_cache(maxsize=256)
+def tokenizar(pseudocodigo):
+    """
+    Tokens (ver _tokenizar_lineas) del pseudocódigo, memoizados por texto: los
+    pseudocódigos repetidos no se vuelven a recorrer.
+    """
+    return _tokenizar_lineas(pseudocodigo.split('\n'))
+
+
 def analizar_iterativo(pseudocodigo):
     """Analiza pseudocódigo imperativo (no recursivo) y estima complejidad."""
-    lineas = pseudocodigo.strip().split('\n')
-    pila_scope = []
-    costos_acumulados = [{'peor': Complejidad.constante(), 'mejor': Complejidad.constante()}]
-
-    # Regex patterns
-    RE_DECLARACION = re.compile(r'^\s*([A-Z]\w*\s+)?\w+(\[\w*(\]\[\w*)*\])?\s*$')
-    RE_CALL = re.compile(r'CALL\s+(\w+)\s*\((.*?)\)', re.IGNORECASE)
-    RE_FOR = re.compile(r'for\s+(\w+)\s*🡨\s*([-\w]+)\s+to\s+([^\s]+)\s+do', re.IGNORECASE)
-    RE_WHILE = re.compile(r'while\s+\((.+)\)\s+do', re.IGNORECASE)
-    RE_REPEAT = re.compile(r'^\s*repeat\s*$', re.IGNORECASE)
-    RE_IF = re.compile(r'^\s*if\s+\(.+\)\s+then\s*$', re.IGNORECASE)
-    RE_ELSE = re.compile(r'^\s*else\s*$', re.IGNORECASE)
-    RE_END = re.compile(r'^\s*end\s*$', re.IGNORECASE)
-    RE_UNTIL = re.compile(r'^\s*until\s*\(.+\)\s*$', re.IGNORECASE)
-    RE_ASSIGN = re.compile(r'^\s*\w+(\[\w+\])?\s*🡨')
-    RE_ARRAY_ACCESS = re.compile(r'\w+\s*\[\s*\w+\s*\]')
-    RE_COMPARE = re.compile(r'[<>=!]=?|≤|≥')
-    RE_RETURN = re.compile(r'^\s*return\b', re.IGNORECASE)
-    RE_HINT = re.compile(r'►\s*O\((.+?)\)', re.IGNORECASE)
-
-    # DP patterns
-    RE_DP_ACCESS_1D = re.compile(r'\b\w+\s*\[\s*\w+\s*\]')
-    RE_DP_ACCESS_2D = re.compile(r'\b\w+\s*\[\s*\w+\s*\]\s*\[\s*\w+\s*\]')
-    RE_MEMO_READ = re.compile(r'if\s*\(\s*\w+\s*\[\s*[^]]+\s*\]\s*(!=|==)\s*\w+\s*\)\s*then', re.IGNORECASE)
-    RE_MEMO_WRITE = re.compile(r'\b\w+\s*\[\s*[^]]+\s*\]\s*🡨')
-    RE_MIN_MAX_TRANSITION = re.compile(r'\b(min|max)\s*\(', re.IGNORECASE)
+    return _analizar_tokens(tokenizar(pseudocodigo))
+
+
+def _analizar_tokens(tokens):
+    """
+    Núcleo de analizar_iterativo sobre líneas ya tokenizadas; analizar_recursividad
+    lo usa directamente con sus líneas filtradas, sin unirlas y volver a partirlas.
+    """
+    # Pila de scopes abiertos en dos listas paralelas: tipo ('FOR', 'IF', ...) y
+    # datos del scope (iteraciones y variable del bucle, costo de la rama if)
+    tipos_scope = []
+    datos_scope = []
+    # Costo acumulado de cada scope abierto, en dos pilas paralelas (peor / mejor caso)
+    # en lugar de un dict por scope
+    costos_peor = [Complejidad.constante()]
+    costos_mejor = [Complejidad.constante()]
 
     dp_context = {
         'table_access': False,
@@ -106,113 +301,105 @@ def analizar_iterativo(pseudocodigo):
         'loops_active_dims': 0,
     }
 
-    def parse_size_expr(expr: str) -> Complejidad:
-        e = expr.strip().lower()
-        if re.fullmatch(r'\d+', e): return Complejidad.constante()
-        if re.fullmatch(r'length\(\w+\)', e): return Complejidad.lineal()
-        m_pow = re.fullmatch(r'n\^(\d+(\.\d+)?)', e)
-        if m_pow: return Complejidad(grado=float(m_pow.group(1)))
-        if e in ('n', 'm'): return Complejidad.lineal()
-        if re.fullmatch(r'n\*m', e): return Complejidad(2.0, 0)
-        if re.fullmatch(r'(n|m)\s*/\s*\d+', e): return Complejidad.lineal()
-        return Complejidad.lineal()
-
     def detect_update_pattern(var: str, linea: str):
-        if re.search(fr'^{var}\s*🡨\s*{var}\s*\+\s*\d+', linea): return 'linear'
-        if re.search(fr'^{var}\s*🡨\s*{var}\s*\-\s*\d+', linea): return 'linear'
-        if re.search(fr'^{var}\s*🡨\s*{var}\s*[*]\s*\d+', linea): return 'log'
-        if re.search(fr'^{var}\s*🡨\s*{var}\s*/\s*\d+', linea): return 'log'
-        return None
-
-    for i, raw in enumerate(lineas):
-        linea = raw.strip()
-        if not linea: continue
-
-        m_hint = RE_HINT.search(linea)
-        if m_hint:
-            hint = m_hint.group(1).strip().lower()
-            comp = Complejidad.constante()
-            if 'n^' in hint:
-                mk = re.search(r'n\^(\d+(\.\d+)?)', hint)
-                comp = Complejidad(float(mk.group(1)), 0) if mk else Complejidad.lineal()
-            elif 'log' in hint and 'n' in hint:
-                comp = Complejidad.log()
-            elif re.search(r'\bn\b', hint):
-                comp = Complejidad.lineal()
-            costos_acumulados[-1]['peor'] += comp
-            costos_acumulados[-1]['mejor'] += comp
-            continue
-
-        if linea.startswith('►'): continue
-
-        if RE_DP_ACCESS_2D.search(linea):
-            dp_context['table_access'] = True
-            dp_context['dimensions'] = max(dp_context['dimensions'], 2)
-        elif RE_DP_ACCESS_1D.search(linea):
-            dp_context['table_access'] = True
-            dp_context['dimensions'] = max(dp_context['dimensions'], 1)
-        if RE_MEMO_READ.search(linea) or RE_MEMO_WRITE.search(linea):
-            dp_context['memoization'] = True
-        if RE_MIN_MAX_TRANSITION.search(linea):
-            dp_context['transition_cost'] = max(dp_context['transition_cost'], Complejidad.constante(), key=lambda c: c.dominio())
-
-        if len(pila_scope) == 0 and linea == 'begin':
-            pila_scope.append(('PRINCIPAL', None))
+        m_upd = RE_ACTUALIZACION.match(linea)
+        if not m_upd or m_upd.group(1) != var: return None
+        return TIPO_ACTUALIZACION[m_upd.group(2)]
+
+    for linea, baja, tipo_linea, grupos, sigue_else in tokens:
+        # Antes de cada regex, una búsqueda de subcadena descarta las líneas que no
+        # pueden coincidir: '►' (pista), '[' (tablas DP), '(' (min/max), 'call'.
+
+        # Una pista '► O(...)' fija el costo de la línea (también si es un CALL):
+        # se busca una sola vez y la línea no se sigue procesando
+        if '►' in linea:
+            m_hint = RE_HINT.search(baja)
+            if m_hint:
+                comp = _complejidad_pista(m_hint.group(1).strip())
+                costos_peor[-1] += comp
+                costos_mejor[-1] += comp
+                continue
+            if linea.startswith('►'): continue
+
+        # Los patrones de asignación solo pueden coincidir si la línea contiene la
+        # flecha; una búsqueda de subcadena evita recorrerla con esas regex.
+        es_asignacion = '🡨' in linea
+
+        if '[' in linea:
+            # Un acceso 1D puede preceder a uno 2D en la misma línea: se recorren los
+            # accesos hasta encontrar uno 2D
+            for m_dp in RE_DP_ACCESS.finditer(linea):
+                dp_context['table_access'] = True
+                dims = 2 if m_dp.group(1) else 1
+                if dims > dp_context['dimensions']:
+                    dp_context['dimensions'] = dims
+                if dims == 2:
+                    break
+            if RE_MEMO_READ.search(baja) or (es_asignacion and RE_MEMO_WRITE.search(linea)):
+                dp_context['memoization'] = True
+        if '(' in baja and RE_MIN_MAX_TRANSITION.search(baja):
+            dp_context['transition_cost'] += Complejidad.constante()
+
+        if not tipos_scope and linea == 'begin':
+            tipos_scope.append('PRINCIPAL')
+            datos_scope.append(None)
             continue
 
-        if len(pila_scope) == 1 and pila_scope[-1][0] == 'PRINCIPAL':
-            if (RE_DECLARACION.match(linea) and '🡨' not in linea and
-                not re.search(r'(for|while|repeat|if|CALL)', linea, re.IGNORECASE)):
+        if len(tipos_scope) == 1 and tipos_scope[0] == 'PRINCIPAL':
+            if (not es_asignacion and RE_DECLARACION.match(linea) and
+                not RE_PALABRA_CONTROL.search(baja)):
                 continue
 
-        m_for = RE_FOR.search(linea)
-        m_while = RE_WHILE.search(linea)
-        m_repeat = RE_REPEAT.search(linea)
-        m_if = RE_IF.search(linea)
-        is_else = RE_ELSE.match(linea) is not None
-        is_end = RE_END.match(linea) is not None
-        m_until = RE_UNTIL.search(linea)
-        m_call = RE_CALL.search(linea)
-
-        if m_for:
-            var, start, stop = m_for.groups()
+        is_end = tipo_linea == 'END'
+
+        if tipo_linea == 'FOR':
+            var, start, stop = grupos
             iters = parse_size_expr(stop)
-            pila_scope.append(('FOR', {'iters': iters, 'var': var}))
-            costos_acumulados.append({'peor': Complejidad.constante(), 'mejor': Complejidad.constante()})
+            tipos_scope.append('FOR')
+            datos_scope.append({'iters': iters, 'var': var})
+            costos_peor.append(Complejidad.constante())
+            costos_mejor.append(Complejidad.constante())
             dp_context['loops_active_dims'] = min(2, dp_context['loops_active_dims'] + 1)
             continue
 
-        if m_while:
-            cond = m_while.group(1)
-            m_var = re.search(r'(\w+)\s*[<>=!≤≥]', cond)
+        if tipo_linea == 'WHILE':
+            cond = grupos
+            m_var = RE_VAR_CONDICION.search(cond)
             var = m_var.group(1) if m_var else None
-            pila_scope.append(('WHILE', {'var': var, 'iters': Complejidad.lineal()}))
-            costos_acumulados.append({'peor': Complejidad.constante(), 'mejor': Complejidad.constante()})
+            tipos_scope.append('WHILE')
+            datos_scope.append({'var': var, 'iters': Complejidad.lineal()})
+            costos_peor.append(Complejidad.constante())
+            costos_mejor.append(Complejidad.constante())
             continue
 
-        if m_repeat:
-            pila_scope.append(('REPEAT', {'var': None, 'iters': Complejidad.lineal()}))
-            costos_acumulados.append({'peor': Complejidad.constante(), 'mejor': Complejidad.constante()})
+        if tipo_linea == 'REPEAT':
+            tipos_scope.append('REPEAT')
+            datos_scope.append({'var': None, 'iters': Complejidad.lineal()})
+            costos_peor.append(Complejidad.constante())
+            costos_mejor.append(Complejidad.constante())
             continue
 
-        if m_if:
-            pila_scope.append(('IF', None))
-            costos_acumulados.append({'peor': Complejidad.constante(), 'mejor': Complejidad.constante()})
+        if tipo_linea == 'IF':
+            tipos_scope.append('IF')
+            datos_scope.append(None)
+            costos_peor.append(Complejidad.constante())
+            costos_mejor.append(Complejidad.constante())
             continue
 
-        if is_else:
-            if not pila_scope or pila_scope[-1][0] != 'IF': continue
-            costo_if = costos_acumulados.pop()
-            pila_scope[-1] = ('ELSE', {'costo_if': costo_if})
-            costos_acumulados.append({'peor': Complejidad.constante(), 'mejor': Complejidad.constante()})
+        if tipo_linea == 'ELSE':
+            if not tipos_scope or tipos_scope[-1] != 'IF': continue
+            tipos_scope[-1] = 'ELSE'
+            datos_scope[-1] = {'costo_if': (costos_peor.pop(), costos_mejor.pop())}
+            costos_peor.append(Complejidad.constante())
+            costos_mejor.append(Complejidad.constante())
             continue
 
-        if pila_scope:
-            tipo, meta = pila_scope[-1]
-            if tipo in ('WHILE', 'REPEAT'):
+        if tipos_scope and es_asignacion:
+            if tipos_scope[-1] in ('WHILE', 'REPEAT'):
+                meta = datos_scope[-1]
                 var = meta.get('var')
                 if not var:
-                    m_asg = re.search(r'^(\w+)\s*🡨', linea)
+                    m_asg = RE_VAR_ASIGNADA.search(linea)
                     if m_asg: meta['var'] = m_asg.group(1)
                     var = meta.get('var')
                 upd = detect_update_pattern(var, linea) if var else None
@@ -221,124 +408,173 @@ def analizar_iterativo(pseudocodigo):
                 elif upd == 'linear':
                     meta['iters'] = Complejidad.lineal()
 
-        if is_end or m_until:
-            if is_end and (i + 1 < len(lineas)) and (lineas[i+1].strip() == 'else' or lineas[i+1].strip().startswith('until')):
+        if is_end or tipo_linea == 'UNTIL':
+            if is_end and sigue_else:
                 continue
-            if not pila_scope: continue
-            tipo_bloque, datos_bloque = pila_scope.pop()
+            if not tipos_scope: continue
+            tipo_bloque = tipos_scope.pop()
+            datos_bloque = datos_scope.pop()
 
             if tipo_bloque == 'PRINCIPAL': break
 
-            costo_bloque_actual = costos_acumulados.pop()
-            padre = costos_acumulados[-1]
+            peor_bloque = costos_peor.pop()
+            mejor_bloque = costos_mejor.pop()
 
             if tipo_bloque in ('FOR', 'WHILE', 'REPEAT'):
                 iters = datos_bloque.get('iters', Complejidad.lineal())
-                padre['peor'] += costo_bloque_actual['peor'] * iters
-                padre['mejor'] += costo_bloque_actual['mejor'] * iters
+                costos_peor[-1] += peor_bloque * iters
+                costos_mejor[-1] += mejor_bloque * iters
                 if tipo_bloque == 'FOR' and dp_context['loops_active_dims'] > 0:
                     dp_context['loops_active_dims'] -= 1
 
             elif tipo_bloque == 'IF':
-                padre['peor'] += costo_bloque_actual['peor']
-                padre['mejor'] += costo_bloque_actual['mejor']
+                costos_peor[-1] += peor_bloque
+                costos_mejor[-1] += mejor_bloque
 
             elif tipo_bloque == 'ELSE':
-                costo_if = datos_bloque['costo_if']
-                costo_else = costo_bloque_actual
-                peor_rama = costo_if['peor'] if costo_if['peor'].dominio() >= costo_else['peor'].dominio() else costo_else['peor']
-                mejor_rama = costo_if['mejor'] if costo_if['mejor'].dominio() <= costo_else['mejor'].dominio() else costo_else['mejor']
-                padre['peor'] += peor_rama
-                padre['mejor'] += mejor_rama
+                peor_if, mejor_if = datos_bloque['costo_if']
+                peor_rama = peor_if if peor_if._dom >= peor_bloque._dom else peor_bloque
+                mejor_rama = mejor_if if mejor_if._dom <= mejor_bloque._dom else mejor_bloque
+                costos_peor[-1] += peor_rama
+                costos_mejor[-1] += mejor_rama
 
             continue
 
+        # Asignaciones, accesos a arreglos, comparaciones y return cuestan O(1):
+        # solo CALL (y el contexto DP) pueden subir el costo de la instrucción
         costo_instr = Complejidad.constante()
 
-        if RE_ASSIGN.search(linea): costo_instr = Complejidad.constante()
-        if RE_ARRAY_ACCESS.search(linea): costo_instr = max(costo_instr, Complejidad.constante(), key=lambda c: c.dominio())
-        if RE_COMPARE.search(linea): costo_instr = max(costo_instr, Complejidad.constante(), key=lambda c: c.dominio())
-        if RE_RETURN.search(linea): costo_instr = max(costo_instr, Complejidad.constante(), key=lambda c: c.dominio())
-
+        # Las estructuras de control ya se resolvieron con RE_CONTROL en tokenizar:
+        # CALL solo se busca en las líneas que llegan hasta aquí
+        m_call = RE_CALL.search(baja) if 'call' in baja else None
         if m_call:
             nombre = m_call.group(1).lower()
             costo_instr = SUBRUTINAS_COMPLEJIDAD.get(nombre, Complejidad.constante())
-            m_inline = RE_HINT.search(linea)
-            if m_inline:
-                hint_text = m_inline.group(1).lower()
-                if 'n^' in hint_text:
-                    k = float(re.search(r'n\^(\d+(\.\d+)?)', hint_text).group(1))
-                    costo_instr = Complejidad(k, 0)
-                elif 'log' in hint_text and 'n' in hint_text:
-                    costo_instr = Complejidad.log()
-                elif re.search(r'\bn\b', hint_text):
-                    costo_instr = Complejidad.lineal()
 
         if dp_context['table_access'] and dp_context['loops_active_dims'] > 0:
-            costo_instr = max(costo_instr, dp_context['transition_cost'], key=lambda c: c.dominio())
+            # Suma asintótica: el término dominante (a igualdad, costo_instr)
+            costo_instr += dp_context['transition_cost']
 
-        costos_acumulados[-1]['peor'] += costo_instr
-        costos_acumulados[-1]['mejor'] += costo_instr
+        # La mayoría de las líneas cuestan O(1): sumarlas no cambia el acumulado
+        if costo_instr is _CONSTANTE: continue
+        costos_peor[-1] += costo_instr
+        costos_mejor[-1] += costo_instr
 
     if dp_context['memoization'] and dp_context['table_access']:
         if dp_context['dimensions'] == 2:
-            costos_acumulados[0]['peor'] += Complejidad(2.0, 0)
-            costos_acumulados[0]['mejor'] += Complejidad(2.0, 0)
+            costos_peor[0] += _CUADRATICA
+            costos_mejor[0] += _CUADRATICA
         elif dp_context['dimensions'] == 1:
-            costos_acumulados[0]['peor'] += Complejidad.lineal()
-            costos_acumulados[0]['mejor'] += Complejidad.lineal()
+            costos_peor[0] += Complejidad.lineal()
+            costos_mejor[0] += Complejidad.lineal()
 
-    resultado_final = costos_acumulados[0]
-    peor_caso = resultado_final['peor']
-    mejor_caso = resultado_final['mejor']
-    if peor_caso.dominio() == mejor_caso.dominio():
+    peor_caso = costos_peor[0]
+    mejor_caso = costos_mejor[0]
+    if peor_caso._dom == mejor_caso._dom:
         caso_promedio_str = f"Θ({peor_caso})"
     else:
         caso_promedio_str = f"Entre Ω({mejor_caso}) y O({peor_caso})"
     return { "Peor Caso (O)": f"O({peor_caso})", "Mejor Caso (Ω)": f"Ω({mejor_caso})", "Caso Promedio (Θ)": caso_promedio_str }
 
 
+# -----------------------------------------------------------------------------
+# TEOREMA MAESTRO
+# -----------------------------------------------------------------------------
+def _calcular_log_base(a, b):
+    """log_b(a) para b > 1; exacto (sin error de redondeo) cuando a es potencia de b."""
+    if a <= 0: return 0.0
+    log_b_a = math.log(a, b)
+    k = round(log_b_a)
+    return float(k) if b ** k == a else log_b_a
+
+
+# a y b casi siempre son enteros pequeños: log_b(a) se precalcula para esos casos
+TABLA_LOG_B_A = {(a, b): _calcular_log_base(a, b) for a in range(1, 9) for b in range(2, 9)}
+
+
+def _log_base(a, b):
+    """log_b(a) desde TABLA_LOG_B_A, o calculado si (a, b) no está en la tabla."""
+    valor = TABLA_LOG_B_A.get((a, b))
+    return valor if valor is not None else _calcular_log_base(a, b)
+
+
+def resolver_teorema_maestro(a, b, f_n):
+    """Resuelve T(n) = a T(n/b) + f(n) (b > 1) y devuelve la Complejidad de T(n)."""
+    log_b_a = _log_base(a, b)
+    if f_n.grado < log_b_a:
+        return Complejidad(grado=log_b_a)
+    if abs(f_n.grado - log_b_a) < 1e-9:  # frontera del caso 2, tolerante al redondeo de log
+        return Complejidad(grado=log_b_a, log_factor=f_n.log_factor + 1)
+    return f_n
+
+
+# Casos resueltos de antemano para las recurrencias habituales:
+# a en 1..4, b en {2, 3}, f(n) = n^k log^j n con k en 0..3 y j en {0, 1}.
+TABLA_TEOREMA_MAESTRO = {
+    (a, b, grado, log_factor): resolver_teorema_maestro(a, b, Complejidad(grado, log_factor))
+    for a in range(1, 5)
+    for b in (2, 3)
+    for grado in range(4)
+    for log_factor in (0, 1)
+}
+
+
 # -----------------------------------------------------------------------------
 # 3. ANALIZADOR DE RECURSIVIDAD (ACTUALIZADO PARA RESTAS)
 # -----------------------------------------------------------------------------
+# Argumento de la forma n/k o n-k dentro de una llamada recursiva
+RE_ARG_DIVISION = re.compile(r'\b\w+\s*/\s*(\d+)')
+RE_ARG_RESTA = re.compile(r'\b\w+\s*-\s*(\d+)')
+
+
+@functools.lru_cache(maxsize=64)
+def _patron_recursion(nombre_funcion):
+    """
+    Regex de la llamada recursiva, compilada una vez por nombre de función. El
+    grupo 1 (en un lookahead, no consume texto) captura los argumentos hasta el
+    primer ')', para buscar en ellos el divisor o la sustracción sin volver a
+    recorrer la línea con otra regex.
+    """
+    return re.compile(fr'CALL\s+{re.escape(nombre_funcion)}\s*\((?=([^)]*))', re.IGNORECASE)
+
+
 def analizar_recursividad(pseudocodigo, nombre_funcion):
     """Analiza recursividad del pseudocódigo (División y Sustracción)."""
     
+    re_llamada = _patron_recursion(nombre_funcion)
+    llamada_literal = f'CALL {nombre_funcion}'
+
+    # Una sola pasada por las líneas:
     # 1. Factor de ramificación (a): número de llamadas a sí mismo
-    a = len(re.findall(fr'CALL\s+{nombre_funcion}\s*\(', pseudocodigo, re.IGNORECASE))
+    # 2. Divisor (b) tipo n/k (n/2, n/3): primera llamada que lo tenga
+    # 3. Sustracción (k) tipo n - k (para T(n) = T(n-1) + ...): primera llamada que la tenga
+    # 4. Líneas del trabajo no recursivo f(n): sin la llamada ni la cabecera
+    a = 0
+    match_b = match_sub = None
+    lineas_filtradas = []
+    for line in pseudocodigo.split('\n'):
+        for m in re_llamada.finditer(line):
+            a += 1
+            if m.end(1) == len(line): continue  # llamada sin ')' de cierre
+            args = m.group(1)
+            if match_b is None: match_b = RE_ARG_DIVISION.search(args)
+            if match_sub is None: match_sub = RE_ARG_RESTA.search(args)
+        if llamada_literal not in line and not RE_CABECERA_ALGORITMO.match(line):
+            lineas_filtradas.append(line)
     if a == 0:
         return None
 
-    # 2. Detectar divisor (b) tipo n/k (n/2, n/3)
-    match_b = re.search(fr'CALL\s+{nombre_funcion}\s*\([^)]*?\b\w+\s*/\s*(\d+)[^)]*\)', pseudocodigo, re.IGNORECASE)
     b = int(match_b.group(1)) if match_b else 1
-
-    # 3. Detectar sustracción (k) tipo n - k (para T(n) = T(n-1) + ...)
-    match_sub = re.search(fr'CALL\s+{nombre_funcion}\s*\([^)]*?\b\w+\s*-\s*(\d+)[^)]*\)', pseudocodigo, re.IGNORECASE)
     k_sub = int(match_sub.group(1)) if match_sub else 0
     if b <= 0: b = 1 # Salvaguarda
 
-    # 4. Trabajo no recursivo f(n)
-    codigo_no_recursivo = "\n".join([line for line in pseudocodigo.split('\n') if f'CALL {nombre_funcion}' not in line])
-    lineas_filtradas = [line for line in codigo_no_recursivo.split('\n') if not re.match(r'^\s*algoritmo\(.*\)', line)]
-    costo_extra_dict = analizar_iterativo('\n'.join(lineas_filtradas)) or {"Peor Caso (O)": "O(1)"}
+    costo_extra_dict = _analizar_tokens(_tokenizar_lineas(lineas_filtradas)) or {"Peor Caso (O)": "O(1)"}
 
     # Parsear f(n)
     costo_peor_str = costo_extra_dict.get('Peor Caso (O)', 'O(1)')
-    match_f_n = re.search(r'O\((.*)\)', costo_peor_str)
+    match_f_n = RE_O_GRANDE.search(costo_peor_str)
     f_n_str = match_f_n.group(1) if match_f_n else "1"
 
-    def parse_comp_str(s: str) -> Complejidad:
-        s = s.lower()
-        if 'n^' in s:
-            mk = re.search(r'n\^(\d+(\.\d+)?)', s)
-            return Complejidad(float(mk.group(1)), 1 if 'log' in s else 0) if mk else Complejidad.lineal()
-        if 'log' in s and 'n' in s:
-            return Complejidad.log()
-        if re.search(r'\bn\b', s):
-            return Complejidad.lineal()
-        return Complejidad.constante()
-
     f_n = parse_comp_str(f_n_str)
 
     # 5. Lógica de Decisión
@@ -364,12 +600,10 @@ def analizar_recursividad(pseudocodigo, nombre_funcion):
             }
 
     # CASO: Branch & Bound (heurístico)
-    RE_BNB_COND = re.compile(r'\b(bound|cota|upper|lower|mejor|best)\b', re.IGNORECASE)
-    RE_BNB_PRUNE = re.compile(r'if\s*\(.+?\)\s*then\s*(return|continue|skip)', re.IGNORECASE)
     hay_poda = bool(RE_BNB_COND.search(pseudocodigo)) and bool(RE_BNB_PRUNE.search(pseudocodigo))
 
     if hay_poda:
-        peor_exponencial = f"O({a}^n)" if a > 1 and b == 1 else f"O(n^{math.log(a, b):.3g})" if (a > 1 and b > 1) else f"O({a}^n)"
+        peor_exponencial = f"O({a}^n)" if a > 1 and b == 1 else f"O(n^{_log_base(a, b):.3g})" if (a > 1 and b > 1) else f"O({a}^n)"
         return {
             "Análisis Branch & Bound": f"Ramificación a={a}, divisor b={b}, poda detectada",
             "Peor Caso (O)": peor_exponencial,
@@ -385,14 +619,9 @@ def analizar_recursividad(pseudocodigo, nombre_funcion):
             return { "Análisis Recursivo": f"T(n) = T(n) + O({f_n})", "Complejidad": f"Θ({f_n})" }
 
     # b > 1
-    log_b_a = math.log(a, b) if a > 0 else 0.0
-    resultado = Complejidad()
-    if f_n.grado < log_b_a:
-        resultado = Complejidad(grado=log_b_a)
-    elif math.isclose(f_n.grado, log_b_a):
-        resultado = Complejidad(grado=log_b_a, log_factor=f_n.log_factor + 1)
-    else:
-        resultado = f_n
+    resultado = TABLA_TEOREMA_MAESTRO.get((a, b, f_n.grado, f_n.log_factor))
+    if resultado is None:
+        resultado = resolver_teorema_maestro(a, b, f_n)
 
     return {
         "Análisis Recursivo": f"Relación: T(n) = {a}T(n/{b}) + O({f_n})",
@@ -403,12 +632,12 @@ def analizar_recursividad(pseudocodigo, nombre_funcion):
 # -----------------------------------------------------------------------------
 # 4. UTILIDAD: LIMPIAR CUERPO PRINCIPAL
 # -----------------------------------------------------------------------------
+@functools.lru_cache(maxsize=256)
 def limpiar_codigo_principal(pseudocodigo):
     lineas = pseudocodigo.split('\n')
     lineas_limpias = []
+    ultima_strip = None  # última línea conservada, ya sin espacios en los extremos
     dentro_subrutina = False
-    RE_CLASE = re.compile(r'^\s*\w+\s*\{.*')
-    RE_SUBRUTINA = re.compile(r'^\s*\w+\(.*\)')
     
     for linea in lineas:
         linea_strip = linea.strip()
@@ -417,23 +646,49 @@ def limpiar_codigo_principal(pseudocodigo):
             dentro_subrutina = True
             continue
         if linea_strip == 'end':
-            if dentro_subrutina and len(lineas_limpias) > 0 and lineas_limpias[-1].strip() == 'begin':
+            if dentro_subrutina and ultima_strip == 'begin':
                 dentro_subrutina = False
                 continue
         if not dentro_subrutina:
             lineas_limpias.append(linea)
+            ultima_strip = linea_strip
             
     return '\n'.join(lineas_limpias)
 
 
-def analizar_complejidad(pseudocodigo, nombre_funcion="algoritmo"):
-    """Despacha el análisis según sea recursivo o no."""
+@functools.lru_cache(maxsize=64)
+def _patron_llamada(nombre_funcion):
+    """Regex (compilada una vez por nombre) de una llamada CALL nombre_funcion(...)."""
+    return re.compile(rf'\bCALL\s+{re.escape(nombre_funcion)}\s*\(', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=256)
+def _analizar_memoizado(pseudocodigo, nombre_funcion):
+    """
+    Resultado de analizar_complejidad congelado como tupla de pares (o None),
+    memoizado por (pseudocodigo, nombre_funcion) con un LRU acotado; solo se usa
+    con memoizar=True.
+    """
+    resultado = analizar_complejidad(pseudocodigo, nombre_funcion)
+    return tuple(resultado.items()) if resultado is not None else None
+
+
+def analizar_complejidad(pseudocodigo, nombre_funcion="algoritmo", memoizar=False):
+    """
+    Despacha el análisis según sea recursivo o no.
+    Con memoizar=True reutiliza el resultado de un análisis previo del mismo texto;
+    es opcional porque en programas triviales la búsqueda cuesta más que analizar.
+    """
+    if memoizar:
+        resultado = _analizar_memoizado(pseudocodigo, nombre_funcion)
+        return dict(resultado) if resultado is not None else None
+
     codigo_limpio = limpiar_codigo_principal(pseudocodigo)
     
     # Intenta detectar el nombre de la función si no es "algoritmo"
     # Si encuentra CALL XXX1, asume XXX1 es la función.
     if nombre_funcion == "algoritmo":
-        m_call_custom = re.search(r'CALL\s+(\w+)', pseudocodigo)
+        m_call_custom = RE_CALL_NOMBRE.search(pseudocodigo)
         if m_call_custom:
             posible_nombre = m_call_custom.group(1)
             # Verifica si el call se refiere a la misma función (recursión)
@@ -441,8 +696,59 @@ def analizar_complejidad(pseudocodigo, nombre_funcion="algoritmo"):
             if posible_nombre not in SUBRUTINAS_COMPLEJIDAD:
                 nombre_funcion = posible_nombre
 
-    if f"CALL {nombre_funcion}" in pseudocodigo:
+    # Sin distinguir mayúsculas y con el nombre completo: 'call algoritmo(' cuenta,
+    # 'CALL algoritmoExtendido(' no
+    if _patron_llamada(nombre_funcion).search(pseudocodigo):
         print(f"--- Detectada recursividad en '{nombre_funcion}' ---")
         return analizar_recursividad(pseudocodigo, nombre_funcion)
     else:
-        return analizar_iterativo(codigo_limpio)
\ No newline at end of file
+        return analizar_iterativo(codigo_limpio)
+
+
+def _normalizar_fuente(pseudocodigo):
+    """Texto sin espacios en los extremos de cada línea: el análisis no depende de ellos."""
+    return '\n'.join(linea.strip() for linea in pseudocodigo.strip().split('\n'))
+
+
+def _analizar_entrada(entrada):
+    """Adaptador de nivel de módulo (serializable) para el pool de procesos."""
+    return analizar_complejidad(*entrada)
+
+
+def analizar_complejidad_batch(entradas, paralelo=False):
+    """
+    Analiza varios pseudocódigos en una sola llamada.
+    Cada entrada puede ser el texto del pseudocódigo o una tupla
+    (pseudocodigo, nombre_funcion[, memoizar]). Devuelve los resultados en el mismo orden;
+    las entradas repetidas (o que solo difieren en la indentación y espacios de
+    los extremos de cada línea) se analizan una sola vez.
+    Con paralelo=True los análisis (independientes entre sí) se reparten en un
+    pool de procesos; solo compensa cuando el lote es grande, porque arrancar
+    los procesos cuesta más que analizar unas pocas decenas de entradas.
+    """
+    claves = []
+    unicas = {}  # clave normalizada -> primera entrada original con ese contenido
+    for entrada in entradas:
+        if isinstance(entrada, str):
+            entrada = (entrada, "algoritmo")
+        pseudocodigo, nombre_funcion, *resto = entrada
+        entrada = (pseudocodigo, nombre_funcion or "algoritmo", bool(resto and resto[0]))
+        clave = (_normalizar_fuente(pseudocodigo), entrada[1])
+        unicas.setdefault(clave, entrada)
+        claves.append(clave)
+
+    if paralelo:
+        with ProcessPoolExecutor() as executor:
+            resueltos = dict(zip(unicas, executor.map(_analizar_entrada, unicas.values())))
+    else:
+        resueltos = {clave: _analizar_entrada(entrada) for clave, entrada in unicas.items()}
+    # Las repeticiones reciben una copia: modificar un resultado no altera los demás
+    resultados = []
+    entregadas = set()
+    for clave in claves:
+        resultado = resueltos[clave]
+        if clave in entregadas and resultado is not None:
+            resultado = dict(resultado)
+        entregadas.add(clave)
+        resultados.append(resultado)
+    return resultados
@@ -1,30 +1,38 @@
 import re
+import types
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
 # -----------------------------------------------------------------------------
 # 1. CLASES DE NODOS PARA EL AST
 # -----------------------------------------------------------------------------
 class Node:
-    pass
+    __slots__ = ()
 
 class ProgramNode(Node):
+    __slots__ = ('statements',)
     def __init__(self, statements):
         self.statements = statements
 
 class AssignmentNode(Node):
+    __slots__ = ('text',)
     def __init__(self, text):
         self.text = text
 
 class ForLoopNode(Node):
+    __slots__ = ('limit', 'body')
     def __init__(self, limit, body):
         self.limit = limit
         self.body = body
 
 class WhileLoopNode(Node):
+    __slots__ = ('condition', 'body')
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
 class IfNode(Node):
+    __slots__ = ('condition', 'if_body', 'else_body')
     def __init__(self, condition, if_body, else_body=None):
         self.condition = condition
         self.if_body = if_body
@@ -33,11 +41,18 @@ class IfNode(Node):
 # -----------------------------------------------------------------------------
 # 2. CLASE DE COMPLEJIDAD (Sin cambios)
 # -----------------------------------------------------------------------------
+@functools.total_ordering
 class Complejidad:
+    __slots__ = ('grado', 'log_factor', '_dom')
+
     def __init__(self, grado=0, log_factor=0):
         self.grado = grado
         self.log_factor = log_factor
+        self._dom = (grado, log_factor)  # orden asintótico, precalculado
     def __repr__(self):
+        texto = _REPR_FRECUENTES.get(self._dom)
+        return texto if texto is not None else self._repr_general()
+    def _repr_general(self):
         if self.grado == 0 and self.log_factor == 0: return "1"
         if self.grado == 0: return f"log(n)" if self.log_factor == 1 else f"log^{self.log_factor}(n)"
         term_n = "n" if self.grado == 1 else f"n^{self.grado}"
@@ -45,136 +60,211 @@ class Complejidad:
         if self.log_factor > 0:
             term_log = "log(n)" if self.log_factor == 1 else f"log^{self.log_factor}(n)"
         return f"{term_n}{' ' if term_n and term_log else ''}{term_log}".strip()
+    def __eq__(self, other):
+        return self._dom == other._dom
+    def __lt__(self, other):
+        return self._dom < other._dom
+    def __hash__(self):
+        return hash(self._dom)
     def __add__(self, other):
-        if self.grado > other.grado: return self
-        if other.grado > self.grado: return other
-        return self if self.log_factor > other.log_factor else other
+        return self if self._dom > other._dom else other
     def __mul__(self, other):
         return Complejidad(self.grado + other.grado, self.log_factor + other.log_factor)
 
+# Instancias compartidas para los valores más usados (no se modifican tras crearse)
+_CONSTANTE = Complejidad()
+_LINEAL = Complejidad(grado=1)
+_LOG = Complejidad(log_factor=1)
+# Representación precalculada de los órdenes habituales: n^0..n^4 por log^0..log^3
+_REPR_FRECUENTES = {(g, l): Complejidad(g, l)._repr_general() for g in range(5) for l in range(4)}
+# Costo O(1) compartido (solo lectura) de las asignaciones y del else ausente
+_COSTO_CONSTANTE = types.MappingProxyType({'peor': _CONSTANTE, 'mejor': _CONSTANTE})
+
 # -----------------------------------------------------------------------------
 # 3. EL PARSER
 # -----------------------------------------------------------------------------
+# Patrones compilados una sola vez al importar el módulo
+RE_FOR = re.compile(r'for\s+\w+\s*🡨\s*\d+\s+to\s+(length\(\w+\)|\w+)\s+do')
+RE_WHILE = re.compile(r'while\s+\(?(.*)\)?\s+do')
+RE_IF = re.compile(r'if\s+\(.*\)\s+then')
+RE_VAR_CONDICION = re.compile(r'(\w+)\s*[<>=!≤≥]')
+
+
+@functools.lru_cache(maxsize=256)
+def patron_actualizacion_log(variable):
+    """Regex de 'variable 🡨 variable * k' o '/ k', compilada una vez por variable."""
+    v = re.escape(variable)
+    return re.compile(fr'^{v}\s*🡨\s*{v}\s*([*\/])')
+
+def nodo_cabecera(line):
+    """Nodo (con cuerpo vacío) para una cabecera for / while / if, o None si no lo es."""
+    match_for = RE_FOR.search(line)
+    if match_for:
+        return ForLoopNode(limit=match_for.group(1), body=ProgramNode([]))
+    match_while = RE_WHILE.search(line)
+    if match_while:
+        return WhileLoopNode(condition=match_while.group(1), body=ProgramNode([]))
+    if RE_IF.search(line):
+        return IfNode(condition=line, if_body=ProgramNode([]))
+    return None
+
+def agregar_sin_bloques(lines, statements):
+    """Añade líneas sin ningún 'begin': las cabeceras quedan con el cuerpo vacío."""
+    for line in lines:
+        node = nodo_cabecera(line)
+        if node is not None:
+            statements.append(node)
+        elif line not in ['else', 'end'] and not line.startswith('until'):
+            statements.append(AssignmentNode(line))
+
 def parse(code_lines):
-    clean_lines = []
+    """
+    Construye el AST en una sola pasada, sin recursión ni copias de sublistas.
+    - Una cabecera for / while / if (o el else de un if) toma como cuerpo el
+      bloque del siguiente 'begin'; las líneas entre ambos se descartan. Si el
+      bloque que la contiene se cierra antes, la cabecera queda con el cuerpo
+      vacío y esas líneas se tratan como sentencias normales.
+    - Un bloque se cierra con el 'end' que devuelve la profundidad (begin - end)
+      al valor previo a su 'begin'.
+    - Si al terminar queda un bloque sin cerrar, su cabecera se queda con el
+      cuerpo vacío y lo que sigue se ignora.
+    """
+    program = ProgramNode([])
+    # Bloques abiertos: (sentencias, profundidad de cierre, nodo dueño, atributo del cuerpo)
+    bloques = [(program.statements, None, None, None)]
+    profundidad = 0
+    pendiente = None    # (nodo, atributo) que espera su 'begin'
+    saltadas = []       # líneas entre la cabecera pendiente y su 'begin'
+    if_cerrado = None   # IfNode cuyo cuerpo acaba de cerrarse: puede seguir un else
+
     for line in code_lines:
-        clean_line = line.split('►')[0].strip()
-        if clean_line:
-            clean_lines.append(clean_line)
-
-    lines = clean_lines
-    statements = []
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        
+        line = line.partition('►')[0].strip()
+        if not line: continue
+        statements, cierre = bloques[-1][0], bloques[-1][1]
+
+        if if_cerrado is not None:
+            node, if_cerrado = if_cerrado, None
+            if line == 'else':
+                node.else_body = ProgramNode([])
+                pendiente = (node, 'else_body')
+                continue
+
         if line == 'begin':
-            i += 1
+            profundidad += 1
+            if pendiente is not None:
+                node, atributo = pendiente
+                body = ProgramNode([])
+                setattr(node, atributo, body)
+                bloques.append((body.statements, profundidad - 1, node, atributo))
+                pendiente, saltadas = None, []
             continue
 
-        match_for = re.search(r'for\s+\w+\s*🡨\s*\d+\s+to\s+(length\(\w+\)|\w+)\s+do', line)
-        match_while = re.search(r'while\s+\(?(.*)\)?\s+do', line)
-        match_if = re.search(r'if\s+\(.*\)\s+then', line)
-        
-        if match_for:
-            body_lines, end_index = extract_body(lines, i)
-            body_ast = parse(body_lines)
-            node = ForLoopNode(limit=match_for.group(1), body=body_ast)
-            statements.append(node)
-            i = end_index
-        elif match_while:
-            body_lines, end_index = extract_body(lines, i)
-            body_ast = parse(body_lines)
-            node = WhileLoopNode(condition=match_while.group(1), body=body_ast)
-            statements.append(node)
-            i = end_index
-        elif match_if:
-            if_body_lines, end_if_index = extract_body(lines, i)
-            if end_if_index + 1 < len(lines) and lines[end_if_index + 1] == 'else':
-                else_body_lines, end_else_index = extract_body(lines, end_if_index + 1)
-                if_ast = parse(if_body_lines)
-                else_ast = parse(else_body_lines)
-                node = IfNode(condition=line, if_body=if_ast, else_body=else_ast)
-                i = end_else_index
-            else:
-                if_ast = parse(if_body_lines)
-                node = IfNode(condition=line, if_body=if_ast)
-                i = end_if_index
+        if line == 'end':
+            profundidad -= 1
+            if profundidad == cierre:
+                if pendiente is not None:
+                    agregar_sin_bloques(saltadas, statements)
+                    pendiente, saltadas = None, []
+                _, _, node, atributo = bloques.pop()
+                if atributo == 'if_body':
+                    if_cerrado = node
+                continue
+
+        if pendiente is not None:
+            saltadas.append(line)
+            continue
+
+        node = nodo_cabecera(line)
+        if node is not None:
             statements.append(node)
+            pendiente = (node, 'if_body' if isinstance(node, IfNode) else 'body')
         elif line not in ['else', 'end'] and not line.startswith('until'):
             statements.append(AssignmentNode(line))
 
-        i += 1
-    return ProgramNode(statements)
-
-def extract_body(lines, start_index):
-    body_lines = []
-    level = 0
-    begin_index = -1
-    for i in range(start_index, len(lines)):
-        if lines[i] == 'begin':
-            begin_index = i
-            level = 1
-            break
-    if begin_index == -1: return [], start_index
-    for i in range(begin_index + 1, len(lines)):
-        line = lines[i]
-        if line == 'begin': level += 1
-        elif line == 'end': level -= 1
-        if level == 0: return body_lines, i
-        body_lines.append(line)
-    return [], len(lines) - 1
+    if len(bloques) > 1:
+        _, _, node, atributo = bloques[1]
+        setattr(node, atributo, ProgramNode([]))
+    elif pendiente is not None:
+        agregar_sin_bloques(saltadas, program.statements)
+    return program
 
 # -----------------------------------------------------------------------------
 # 4. EL ANALIZADOR
 # -----------------------------------------------------------------------------
+def _analizar_programa(node):
+    peor = mejor = _CONSTANTE
+    for stmt in node.statements:
+        stmt_cost = analyze_ast(stmt)
+        peor += stmt_cost['peor']
+        mejor += stmt_cost['mejor']
+    return {'peor': peor, 'mejor': mejor}
+
+def _analizar_asignacion(node):
+    return _COSTO_CONSTANTE
+
+def _analizar_for(node):
+    costo_cuerpo = analyze_ast(node.body)
+    costo_iteraciones = _LINEAL
+    return {'peor': costo_cuerpo['peor'] * costo_iteraciones, 'mejor': costo_cuerpo['mejor'] * costo_iteraciones}
+
+def _analizar_while(node):
+    costo_cuerpo = analyze_ast(node.body)
+    costo_iteraciones = _LINEAL
+    match_cond_var = RE_VAR_CONDICION.search(node.condition)
+    if match_cond_var:
+        patron_log = patron_actualizacion_log(match_cond_var.group(1))
+        for stmt in node.body.statements:
+            if isinstance(stmt, AssignmentNode):
+                if patron_log.search(stmt.text):
+                    costo_iteraciones = _LOG
+                    break
+    return {'peor': costo_cuerpo['peor'] * costo_iteraciones, 'mejor': costo_cuerpo['mejor'] * costo_iteraciones}
+
+def _analizar_if(node):
+    costo_if = analyze_ast(node.if_body)
+    costo_else = analyze_ast(node.else_body) if node.else_body else _COSTO_CONSTANTE
+    return {
+        'peor': max(costo_if['peor'], costo_else['peor']),
+        'mejor': min(costo_if['mejor'], costo_else['mejor'])
+    }
+
+# Un analizador por tipo de nodo: despacho con una sola búsqueda en el dict
+_ANALIZADORES = {
+    ProgramNode: _analizar_programa,
+    AssignmentNode: _analizar_asignacion,
+    ForLoopNode: _analizar_for,
+    WhileLoopNode: _analizar_while,
+    IfNode: _analizar_if,
+}
+
 def analyze_ast(node):
-    if isinstance(node, ProgramNode):
-        costo = {'peor': Complejidad(), 'mejor': Complejidad()}
-        for stmt in node.statements:
-            stmt_cost = analyze_ast(stmt)
-            costo['peor'] += stmt_cost['peor']
-            costo['mejor'] += stmt_cost['mejor']
-        return costo
-    if isinstance(node, AssignmentNode):
-        return {'peor': Complejidad(), 'mejor': Complejidad()}
-    if isinstance(node, ForLoopNode):
-        costo_cuerpo = analyze_ast(node.body)
-        costo_iteraciones = Complejidad(grado=1)
-        return {'peor': costo_cuerpo['peor'] * costo_iteraciones, 'mejor': costo_cuerpo['mejor'] * costo_iteraciones}
-    if isinstance(node, WhileLoopNode):
-        costo_cuerpo = analyze_ast(node.body)
-        costo_iteraciones = Complejidad(grado=1)
-        match_cond_var = re.search(r'(\w+)\s*[<>=!≤≥]', node.condition)
-        if match_cond_var:
-            variable = match_cond_var.group(1)
-            for stmt in node.body.statements:
-                if isinstance(stmt, AssignmentNode):
-                    if re.search(fr'^{variable}\s*🡨\s*{variable}\s*([*\/])', stmt.text):
-                        costo_iteraciones = Complejidad(log_factor=1)
-                        break
-        return {'peor': costo_cuerpo['peor'] * costo_iteraciones, 'mejor': costo_cuerpo['mejor'] * costo_iteraciones}
-    if isinstance(node, IfNode):
-        costo_if = analyze_ast(node.if_body)
-        costo_else = analyze_ast(node.else_body) if node.else_body else {'peor': Complejidad(), 'mejor': Complejidad()}
-        return {
-            'peor': max(costo_if['peor'], costo_else['peor'], key=lambda c: (c.grado, c.log_factor)),
-            'mejor': min(costo_if['mejor'], costo_else['mejor'], key=lambda c: (c.grado, c.log_factor))
-        }
+    return _ANALIZADORES[type(node)](node)
 
 def analizar_complejidad(pseudocodigo):
-    lineas = pseudocodigo.strip().split('\n')
+    """
+    Peor, mejor y caso promedio del pseudocódigo. El resultado solo depende del
+    texto sin espacios en los extremos, y se memoiza por ese texto.
+    """
+    return dict(_analizar_memoizado(pseudocodigo.strip()))
+
+@functools.lru_cache(maxsize=512)
+def _analizar_memoizado(pseudocodigo):
+    """Análisis de analizar_complejidad congelado como tupla de pares (hashable)."""
+    lineas = pseudocodigo.split('\n')
     ast = parse(lineas)
     resultado = analyze_ast(ast)
     peor_caso = resultado['peor']
     mejor_caso = resultado['mejor']
+    # Cada cota se formatea una sola vez y se reutiliza en el caso promedio
+    peor_str = f"O({peor_caso})"
+    mejor_str = f"Ω({mejor_caso})"
 
-    if peor_caso.grado == mejor_caso.grado and peor_caso.log_factor == mejor_caso.log_factor:
+    if peor_caso._dom == mejor_caso._dom:
         caso_promedio_str = f"Θ({peor_caso})"
     else:
-        caso_promedio_str = f"Entre Ω({mejor_caso}) y O({peor_caso})"
+        caso_promedio_str = f"Entre {mejor_str} y {peor_str}"
 
-    return {"Peor Caso (O)": f"O({peor_caso})", "Mejor Caso (Ω)": f"Ω({mejor_caso})", "Caso Promedio (Θ)": caso_promedio_str}
+    return (("Peor Caso (O)", peor_str), ("Mejor Caso (Ω)", mejor_str), ("Caso Promedio (Θ)", caso_promedio_str))
 
 # -----------------------------------------------------------------------------
 # 5. CONJUNTO DE PRUEBAS COMPLETO
@@ -276,31 +366,23 @@ end
 """
 
 # --- Ejecución de todas las pruebas ---
-print("="*40)
-print("Prueba 1: Análisis del Algoritmo Constante")
-print(analizar_complejidad(algo_constante))
-print("="*40)
-
-print("\nPrueba 2: Análisis del Algoritmo Lineal (FOR)")
-print(analizar_complejidad(algo_lineal))
-print("="*40)
-
-print("\nPrueba 3: Análisis del Algoritmo Cuadrático")
-print(analizar_complejidad(algo_cuadratico))
-print("="*40)
-
-print("\nPrueba 4: Análisis del Algoritmo Condicional")
-print(analizar_complejidad(algo_condicional))
-print("="*40)
+# Las pruebas son independientes: se analizan en un pool de hilos y se
+# imprimen después, en el orden original.
+PRUEBAS = [
+    ("Prueba 1: Análisis del Algoritmo Constante", algo_constante),
+    ("\nPrueba 2: Análisis del Algoritmo Lineal (FOR)", algo_lineal),
+    ("\nPrueba 3: Análisis del Algoritmo Cuadrático", algo_cuadratico),
+    ("\nPrueba 4: Análisis del Algoritmo Condicional", algo_condicional),
+    ("\nPrueba 5: Análisis del Bucle WHILE Lineal", algo_while_lineal),
+    ("\nPrueba 9: Análisis de Búsqueda Lineal en Arreglo", algo_busqueda_arreglo),
+    ("\nPrueba Adicional: FOR con WHILE anidado", algo_for_while_anidado),
+]
+
+with ThreadPoolExecutor(max_workers=4) as ejecutor:
+    resultados = list(ejecutor.map(lambda prueba: (prueba[0], analizar_complejidad(prueba[1])), PRUEBAS))
 
-print("\nPrueba 5: Análisis del Bucle WHILE Lineal")
-print(analizar_complejidad(algo_while_lineal))
 print("="*40)
-
-print("\nPrueba 9: Análisis de Búsqueda Lineal en Arreglo")
-print(analizar_complejidad(algo_busqueda_arreglo))
-print("="*40)
-
-print("\nPrueba Adicional: FOR con WHILE anidado")
-print(analizar_complejidad(algo_for_while_anidado))
-print("="*40)
\ No newline at end of file
+for titulo, resultado in resultados:
+    print(titulo)
+    print(resultado)
+    print("="*40)
@@ -1,5 +1,8 @@
 import re
 
+# Bucle FOR simple: captura el límite superior ("n")
+RE_FOR = re.compile(r'for\s+\w+\s*🡨\s*\d+\s+to\s+(\w+)\s+do')
+
 def analizar_complejidad(pseudocodigo):
     """
     Analiza un pseudocódigo simple para determinar su complejidad Big O.
@@ -11,11 +14,26 @@ def analizar_complejidad(pseudocodigo):
     lineas = pseudocodigo.strip().split('\n')
     costo_total = 0
     multiplicadores_bucle = [] # Pila para manejar bucles anidados
+    # Datos para la expresión final, reunidos en la misma pasada
+    variables_complejidad = set()
+    max_anidacion = 0
+    anidacion_actual = 0
 
     print("--- Inicio del Análisis Línea por Línea ---")
 
     for i, linea in enumerate(lineas):
         linea = linea.strip()
+
+        # Variables de los bucles y anidación máxima: cuentan todas las líneas,
+        # también los comentarios
+        match_for = RE_FOR.search(linea)
+        if match_for:
+            variables_complejidad.add(match_for.group(1))
+        if 'for' in linea:
+            anidacion_actual += 1
+            max_anidacion = max(max_anidacion, anidacion_actual)
+        if 'end' in linea and anidacion_actual > 0:
+            anidacion_actual -= 1
         
         # Ignorar comentarios y líneas vacías
         if not linea or linea.startswith('►'):
@@ -24,7 +42,6 @@ def analizar_complejidad(pseudocodigo):
 
         # Detectar inicio de un bucle FOR
         # Usamos una expresión regular para capturar "n"
-        match_for = re.search(r'for\s+\w+\s*🡨\s*\d+\s+to\s+(\w+)\s+do', linea)
         if match_for:
             limite_bucle = match_for.group(1)
             multiplicadores_bucle.append(limite_bucle)
@@ -59,23 +76,8 @@ def analizar_complejidad(pseudocodigo):
 
 
     # Construir la expresión de complejidad final
-    # Este es un enfoque simplificado para el peor caso (Big O)
-    variables_complejidad = set()
-    for linea in lineas:
-        match_for = re.search(r'for\s+\w+\s*🡨\s*\d+\s+to\s+(\w+)\s+do', linea)
-        if match_for:
-            variables_complejidad.add(match_for.group(1))
-    
-    # Determinar el orden de complejidad basado en la anidación máxima
-    max_anidacion = 0
-    anidacion_actual = 0
-    for linea in lineas:
-        if 'for' in linea:
-            anidacion_actual += 1
-            max_anidacion = max(max_anidacion, anidacion_actual)
-        if 'end' in linea and anidacion_actual > 0:
-            anidacion_actual -= 1
-            
+    # Este es un enfoque simplificado para el peor caso (Big O):
+    # el orden depende de la anidación máxima
     if max_anidacion == 0:
         complejidad = "O(1)"
     elif max_anidacion == 1:
@@ -16,7 +16,7 @@ import time  # Medición de latencias (analizador, LLM y diagrama)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from models.analizador import analizar_complejidad
-from helpers.llm_helper import configurar_llm, obtener_analisis_llm, traducir_a_pseudocodigo, generar_diagrama_dot
+from helpers.llm_helper import configurar_llm, obtener_analisis_llm_stream, traducir_a_pseudocodigo, generar_diagrama_dot, tasa_aciertos_cache
 
 # Importar ejemplos de pseudocódigo para pruebas rápidas desde el sidebar
 # Se usa try/except para evitar que la UI falle si el módulo data/pruebas no existe
@@ -132,6 +132,10 @@ with st.sidebar:
     else:
         st.markdown('<span class="badge badge-err">API Key ausente</span>', unsafe_allow_html=True)
 
+    tasa_cache = tasa_aciertos_cache()
+    if tasa_cache is not None:
+        st.metric("Caché de contexto (aciertos)", f"{tasa_cache:.1%}")
+
     st.markdown("---")
     es_lenguaje_natural = st.toggle("Entrada en lenguaje natural", value=False)
     st.markdown("---")
@@ -272,7 +276,7 @@ with st.chat_message("assistant"):
     with tab1:
         start_time_ast = time.perf_counter()
         try:
-            resultado = analizar_complejidad(codigo_a_analizar)
+            resultado = analizar_complejidad(codigo_a_analizar, memoizar=True)
             formatted_result = json.dumps(resultado, indent=2, ensure_ascii=False)
             status_ok = True
         except Exception as e:
@@ -293,14 +297,15 @@ with st.chat_message("assistant"):
     # Tab 2: LLM
     with tab2:
         if api_key:
+            # La respuesta se muestra en streaming; el tiempo se completa al terminar
+            cabecera_llm = st.empty()
+            cabecera_llm.markdown("#### Opinión del Experto")
             start_time_llm = time.perf_counter()
-            with st.spinner("Consultando LLM..."):
-                analisis_llm = obtener_analisis_llm(api_key, codigo_a_analizar)
+            analisis_llm = st.write_stream(obtener_analisis_llm_stream(api_key, codigo_a_analizar))
             end_time_llm = time.perf_counter()
             llm_time = end_time_llm - start_time_llm
             
-            st.markdown(f"#### Opinión del Experto <span class='badge' style='color: var(--muted);'>Tiempo: {llm_time:.2f}s</span>", unsafe_allow_html=True)
-            st.markdown(analisis_llm)
+            cabecera_llm.markdown(f"#### Opinión del Experto <span class='badge' style='color: var(--muted);'>Tiempo: {llm_time:.2f}s</span>", unsafe_allow_html=True)
             texto_acumulado_respuesta += f"**🤖 Análisis LLM:**\n{analisis_llm}\n\n"
         else:
             st.markdown("#### Opinión del Experto")
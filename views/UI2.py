@@ -10,73 +10,60 @@ import os
 import json
 import streamlit as st
 import time  # Medición de latencias (analizador, LLM y diagrama)
+import collections
 
 # Ajuste de paths
 # Añade la carpeta raíz del proyecto al sys.path para que los imports relativos funcionen
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from models.analizador import analizar_complejidad
-from helpers.llm_helper2 import configurar_llm, obtener_analisis_llm, traducir_a_pseudocodigo, generar_diagrama_dot
-
-# Importar ejemplos de pseudocódigo para pruebas rápidas desde el sidebar
-# Se usa try/except para evitar que la UI falle si el módulo data/pruebas no existe
-try:
-    from data.pruebas import (
-        algo_constante, algo_lineal, algo_cuadratico, algo_condicional, algo_while_lineal,
-        algo_repeat_log, algo_busqueda_binaria, algo_merge_sort, algo_busqueda_arreglo,
-        algo_con_declaraciones, algo_lineal_con_declaraciones, algo_call_o1, algo_call_on,
-        algo_call_anidado, algo_call_merge_sort_detallado, algo_for_n2, algo_cubico,
-        algo_while_log, algo_for_con_log_interno, algo_if_balanceado, algo_for_length_m,
-        algo_for_y_for_interno, algo_repeat_log_base3, algo_while_length, algo_call_swap_n2,
-        algo_mixto_call_y_log, algo_if_pesado, algo_for_m, algo_for_n_y_m, algo_recursion_3_llamadas,
-        algo_dp_1d, algo_dp_2d, algo_dp_memo_1d, algo_dp_memo_2d, algo_dp_2d_n2, algo_dp_1d_log,
-        algo_bnb_subsets, algo_bnb_tsp, algo_bnb_knapsack
-    )
-    # Mapa legible en UI: nombre descriptivo -> contenido del ejemplo
-    EJEMPLOS_DICT = {
-        "Prueba 1: Algoritmo Constante": algo_constante,
-        "Prueba 2: Algoritmo Lineal (FOR)": algo_lineal,
-        "Prueba 3: Algoritmo Cuadrático (FOR anidado)": algo_cuadratico,
-        "Prueba 4: Condicional (Mejor/Peor)": algo_condicional,
-        "Prueba 5: While lineal": algo_while_lineal,
-        "Prueba 6: Repeat logarítmico": algo_repeat_log,
-        "Prueba 7: Búsqueda Binaria Recursiva": algo_busqueda_binaria,
-        "Prueba 8: Merge Sort (simplificado)": algo_merge_sort,
-        "Prueba 9: Búsqueda lineal en arreglo": algo_busqueda_arreglo,
-        "Prueba 10: Declaraciones de variables/objetos": algo_con_declaraciones,
-        "Prueba 11: Lineal con declaraciones": algo_lineal_con_declaraciones,
-        "Prueba 12: For con CALL O(1)": algo_call_o1,
-        "Prueba 13: For con CALL O(n)": algo_call_on,
-        "Prueba 14: For anidado con CALL O(1)": algo_call_anidado,
-        "Prueba 15: Merge Sort detallado (CALL O(n))": algo_call_merge_sort_detallado,
-        "Prueba 16: For hasta n^2": algo_for_n2,
-        "Prueba 17: Triple bucle (cúbico)": algo_cubico,
-        "Prueba 18: While halving (log n)": algo_while_log,
-        "Prueba 19: For con log interno": algo_for_con_log_interno,
-        "Prueba 20: If-else equilibrado": algo_if_balanceado,
-        "Prueba 21: For sobre length(B)": algo_for_length_m,
-        "Prueba 22: Doble for n y n": algo_for_y_for_interno,
-        "Prueba 23: Repeat base 3 (log n)": algo_repeat_log_base3,
-        "Prueba 24: While hasta length(A)": algo_while_length,
-        "Prueba 25: CALL swap en n^2": algo_call_swap_n2,
-        "Prueba 26: CALL O(n) + log interno": algo_mixto_call_y_log,
-        "Prueba 27: If n^2 vs O(1)": algo_if_pesado,
-        "Prueba 28: For hasta m": algo_for_m,
-        "Prueba 29: For n y m (O(n*m))": algo_for_n_y_m,
-        "Prueba 30: Recursión 3 llamadas + trabajo lineal": algo_recursion_3_llamadas,
-        "DP 1: Tabla 1D (O(n))": algo_dp_1d,
-        "DP 2: Tabla 2D (O(n*m))": algo_dp_2d,
-        "DP 3: Memoización 1D": algo_dp_memo_1d,
-        "DP 4: Memoización 2D": algo_dp_memo_2d,
-        "DP 5: 2D n x n (O(n^2))": algo_dp_2d_n2,
-        "DP 6: 1D con while log (O(n log n))": algo_dp_1d_log,
-        "BnB 1: Subconjuntos con poda": algo_bnb_subsets,
-        "BnB 2: TSP con poda": algo_bnb_tsp,
-        "BnB 3: Knapsack con poda + n/2": algo_bnb_knapsack,
-    }
-except Exception:
-    # Si falla la importación, la UI sigue operativa (solo sin ejemplos precargados)
-    EJEMPLOS_DICT = {}
+from helpers.llm_helper2 import configurar_llm, traducir_a_pseudocodigo_stream, iniciar_analisis_y_dot
+
+# Ejemplos de pseudocódigo para pruebas rápidas desde el sidebar
+# Mapa legible en UI: nombre descriptivo -> nombre del ejemplo en data/pruebas.
+# El módulo se importa solo al insertar un ejemplo (ver cargar_ejemplo_seleccionado),
+# no en cada rerun de Streamlit.
+EJEMPLOS_DICT = {
+    "Prueba 1: Algoritmo Constante": "algo_constante",
+    "Prueba 2: Algoritmo Lineal (FOR)": "algo_lineal",
+    "Prueba 3: Algoritmo Cuadrático (FOR anidado)": "algo_cuadratico",
+    "Prueba 4: Condicional (Mejor/Peor)": "algo_condicional",
+    "Prueba 5: While lineal": "algo_while_lineal",
+    "Prueba 6: Repeat logarítmico": "algo_repeat_log",
+    "Prueba 7: Búsqueda Binaria Recursiva": "algo_busqueda_binaria",
+    "Prueba 8: Merge Sort (simplificado)": "algo_merge_sort",
+    "Prueba 9: Búsqueda lineal en arreglo": "algo_busqueda_arreglo",
+    "Prueba 10: Declaraciones de variables/objetos": "algo_con_declaraciones",
+    "Prueba 11: Lineal con declaraciones": "algo_lineal_con_declaraciones",
+    "Prueba 12: For con CALL O(1)": "algo_call_o1",
+    "Prueba 13: For con CALL O(n)": "algo_call_on",
+    "Prueba 14: For anidado con CALL O(1)": "algo_call_anidado",
+    "Prueba 15: Merge Sort detallado (CALL O(n))": "algo_call_merge_sort_detallado",
+    "Prueba 16: For hasta n^2": "algo_for_n2",
+    "Prueba 17: Triple bucle (cúbico)": "algo_cubico",
+    "Prueba 18: While halving (log n)": "algo_while_log",
+    "Prueba 19: For con log interno": "algo_for_con_log_interno",
+    "Prueba 20: If-else equilibrado": "algo_if_balanceado",
+    "Prueba 21: For sobre length(B)": "algo_for_length_m",
+    "Prueba 22: Doble for n y n": "algo_for_y_for_interno",
+    "Prueba 23: Repeat base 3 (log n)": "algo_repeat_log_base3",
+    "Prueba 24: While hasta length(A)": "algo_while_length",
+    "Prueba 25: CALL swap en n^2": "algo_call_swap_n2",
+    "Prueba 26: CALL O(n) + log interno": "algo_mixto_call_y_log",
+    "Prueba 27: If n^2 vs O(1)": "algo_if_pesado",
+    "Prueba 28: For hasta m": "algo_for_m",
+    "Prueba 29: For n y m (O(n*m))": "algo_for_n_y_m",
+    "Prueba 30: Recursión 3 llamadas + trabajo lineal": "algo_recursion_3_llamadas",
+    "DP 1: Tabla 1D (O(n))": "algo_dp_1d",
+    "DP 2: Tabla 2D (O(n*m))": "algo_dp_2d",
+    "DP 3: Memoización 1D": "algo_dp_memo_1d",
+    "DP 4: Memoización 2D": "algo_dp_memo_2d",
+    "DP 5: 2D n x n (O(n^2))": "algo_dp_2d_n2",
+    "DP 6: 1D con while log (O(n log n))": "algo_dp_1d_log",
+    "BnB 1: Subconjuntos con poda": "algo_bnb_subsets",
+    "BnB 2: TSP con poda": "algo_bnb_tsp",
+    "BnB 3: Knapsack con poda + n/2": "algo_bnb_knapsack",
+}
 
 # ---------------------------
 # Configuración de Página y CSS
@@ -119,6 +106,21 @@ pre code, .stCodeBlock { background: #0b1222 !important; border: 1px solid #1f29
 """
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
+# Fragmento HTML fijo del badge de tiempo: solo se rellenan segundos y decimales
+BADGE_TIEMPO = "<span class='badge' style='color: var(--muted);'>Tiempo: {:.{}f}s</span>"
+
+def badge_tiempo(segundos, decimales=2):
+    return BADGE_TIEMPO.format(segundos, decimales)
+
+# Límites del historial en sesión: Streamlit lo mantiene en memoria del servidor
+MAX_MENSAJES_HISTORIAL = 50
+MAX_TEXTO_HISTORIAL = 16 * 1024  # caracteres guardados por respuesta
+
+def recortar_para_historial(texto):
+    if len(texto) <= MAX_TEXTO_HISTORIAL:
+        return texto
+    return texto[:MAX_TEXTO_HISTORIAL] + "\n\n*[Respuesta truncada en el historial]*"
+
 # ---------------------------
 # Sidebar
 # ---------------------------
@@ -147,7 +149,8 @@ st.markdown('<div class="section-title">Ingresa tu pseudocódigo o descripción.
 # Historial
 # ---------------------------
 if "messages" not in st.session_state:
-    st.session_state.messages = []
+    # Cola acotada: los mensajes más antiguos se descartan solos
+    st.session_state.messages = collections.deque(maxlen=MAX_MENSAJES_HISTORIAL)
 
 with st.expander("Historial de interacción", expanded=False):
     for message in st.session_state.messages:
@@ -182,7 +185,13 @@ st.markdown("---")
 def cargar_ejemplo_seleccionado():
     seleccion = st.session_state.selector_ejemplos_key
     if seleccion and seleccion in EJEMPLOS_DICT:
-        st.session_state.prompt_input = EJEMPLOS_DICT[seleccion].strip()
+        # Se usa try/except para evitar que la UI falle si el módulo data/pruebas no existe
+        try:
+            from data import pruebas
+        except Exception:
+            st.toast("No se pudieron cargar los ejemplos")
+            return
+        st.session_state.prompt_input = getattr(pruebas, EJEMPLOS_DICT[seleccion]).strip()
 
 def limpiar_callback():
     st.session_state.prompt_input = ""
@@ -240,30 +249,42 @@ with st.chat_message("user"):
     st.markdown(user_message)
 
 with st.chat_message("assistant"):
-    # Variables para construir la respuesta final estructurada
-    texto_acumulado_respuesta = ""
+    # Partes de la respuesta final estructurada (se unen una sola vez al guardar)
+    partes_respuesta = []
     codigo_dot_para_historial = None
     
     codigo_a_analizar = prompt_val
 
     # A. Traducción
     if es_lenguaje_natural and api_key:
+        # Las líneas ya limpias se pintan a medida que Groq las genera
+        cabecera_trad = st.empty()
+        cabecera_trad.markdown("### 🔄 Traducción")
+        bloque_trad = st.empty()
         start_time_trad = time.perf_counter()
-        with st.spinner("Traduciendo..."):
-            codigo_traducido = traducir_a_pseudocodigo(api_key, prompt_val)
+        codigo_traducido = ""
+        for linea in traducir_a_pseudocodigo_stream(api_key, prompt_val):
+            codigo_traducido += linea
+            bloque_trad.code(codigo_traducido, language="plaintext")
+        codigo_traducido = codigo_traducido.strip()
         end_time_trad = time.perf_counter()
         translation_time = end_time_trad - start_time_trad
         
-        st.markdown(f"### 🔄 Traducción <span class='badge' style='color: var(--muted);'>Tiempo: {translation_time:.2f}s</span>", unsafe_allow_html=True)
+        cabecera_trad.markdown(f"### 🔄 Traducción {badge_tiempo(translation_time)}", unsafe_allow_html=True)
 
         if "❌" in codigo_traducido:
-            st.error(codigo_traducido)
+            bloque_trad.error(codigo_traducido)
             st.stop()
-        st.code(codigo_traducido, language="plaintext")
         codigo_a_analizar = codigo_traducido
-        texto_acumulado_respuesta += f"**🔄 Pseudocódigo Traducido:**\n```plaintext\n{codigo_a_analizar}\n```\n\n"
+        partes_respuesta.append(f"**🔄 Pseudocódigo Traducido:**\n```plaintext\n{codigo_a_analizar}\n```\n\n")
     else:
-        texto_acumulado_respuesta += f"**Pseudocódigo Analizado:**\n```plaintext\n{codigo_a_analizar}\n```\n\n"
+        partes_respuesta.append(f"**Pseudocódigo Analizado:**\n```plaintext\n{codigo_a_analizar}\n```\n\n")
+
+    # Análisis LLM y diagrama salen de una sola llamada a Groq, lanzada en segundo
+    # plano para que corra en paralelo con el análisis estático
+    if api_key:
+        start_time_llm = time.perf_counter()
+        futuro_llm = iniciar_analisis_y_dot(api_key, codigo_a_analizar)
 
     # B. Tabs de Resultados
     tab1, tab2, tab3 = st.tabs(["📊 Análisis", "🤖 Opinión del LLM", "🕸️ Diagrama"])
@@ -272,7 +293,7 @@ with st.chat_message("assistant"):
     with tab1:
         start_time_ast = time.perf_counter()
         try:
-            resultado = analizar_complejidad(codigo_a_analizar)
+            resultado = analizar_complejidad(codigo_a_analizar, memoizar=True)
             formatted_result = json.dumps(resultado, indent=2, ensure_ascii=False)
             status_ok = True
         except Exception as e:
@@ -281,27 +302,26 @@ with st.chat_message("assistant"):
         end_time_ast = time.perf_counter()
         analyzer_time = end_time_ast - start_time_ast
 
-        st.markdown(f"#### Análisis Estático <span class='badge' style='color: var(--muted);'>Tiempo: {analyzer_time:.4f}s</span>", unsafe_allow_html=True)
+        st.markdown(f"#### Análisis Estático {badge_tiempo(analyzer_time, 4)}", unsafe_allow_html=True)
         
         if status_ok:
             st.code(formatted_result, language="json")
-            texto_acumulado_respuesta += f"**📊 Análisis del Sistema:**\n```json\n{formatted_result}\n```\n\n"
+            partes_respuesta.append(f"**📊 Análisis del Sistema:**\n```json\n{formatted_result}\n```\n\n")
         else:
             st.error(formatted_result)
-            texto_acumulado_respuesta += f"**Error Análisis:** {formatted_result}\n\n"
+            partes_respuesta.append(f"**Error Análisis:** {formatted_result}\n\n")
 
     # Tab 2: LLM
     with tab2:
         if api_key:
-            start_time_llm = time.perf_counter()
-            with st.spinner("Consultando LLM..."):
-                analisis_llm = obtener_analisis_llm(api_key, codigo_a_analizar)
+            with st.spinner("Consultando al LLM..."):
+                analisis_llm, codigo_dot = futuro_llm.result()
             end_time_llm = time.perf_counter()
             llm_time = end_time_llm - start_time_llm
             
-            st.markdown(f"#### Opinión del Experto <span class='badge' style='color: var(--muted);'>Tiempo: {llm_time:.2f}s</span>", unsafe_allow_html=True)
+            st.markdown(f"#### Opinión del Experto {badge_tiempo(llm_time)}", unsafe_allow_html=True)
             st.markdown(analisis_llm)
-            texto_acumulado_respuesta += f"**🤖 Análisis LLM:**\n{analisis_llm}\n\n"
+            partes_respuesta.append(f"**🤖 Análisis LLM:**\n{analisis_llm}\n\n")
         else:
             st.markdown("#### Opinión del Experto")
             st.warning("Falta API Key")
@@ -309,13 +329,8 @@ with st.chat_message("assistant"):
     # Tab 3: Graphviz (capturamos el código para el historial)
     with tab3:
         if api_key:
-            start_time_diag = time.perf_counter()
-            with st.spinner("Generando diagrama..."):
-                codigo_dot = generar_diagrama_dot(api_key, codigo_a_analizar)
-            end_time_diag = time.perf_counter()
-            diagram_time = end_time_diag - start_time_diag
-
-            st.markdown(f"#### Diagrama de Seguimiento <span class='badge' style='color: var(--muted);'>Tiempo: {diagram_time:.2f}s</span>", unsafe_allow_html=True)
+            # El DOT llegó junto con el análisis de la pestaña 2
+            st.markdown(f"#### Diagrama de Seguimiento {badge_tiempo(llm_time)}", unsafe_allow_html=True)
             
             if codigo_dot and ("digraph" in codigo_dot or "graph" in codigo_dot):
                 try:
@@ -323,7 +338,7 @@ with st.chat_message("assistant"):
                     codigo_dot_para_historial = codigo_dot 
                     with st.expander("Ver código DOT"):
                         st.code(codigo_dot, language="dot")
-                    texto_acumulado_respuesta += "**🕸️ Diagrama generado correctamente.**"
+                    partes_respuesta.append("**🕸️ Diagrama generado correctamente.**")
                 except Exception as e:
                     st.error(f"Error visual: {e}")
             else:
@@ -337,7 +352,7 @@ with st.chat_message("assistant"):
     # ---------------------------
     # Guardamos un DICCIONARIO
     mensaje_final_struct = {
-        "text": texto_acumulado_respuesta,
+        "text": recortar_para_historial("".join(partes_respuesta)),
         "dot_code": codigo_dot_para_historial
     }
     